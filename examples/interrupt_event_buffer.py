@@ -0,0 +1,48 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# Website: www.mischianti.org
+# VERSION: 0.0.2
+#
+# Description:
+# This script use pcf8574 with the built-in interrupt handler
+# pin 18 is used as interrupt pin
+# the hard IRQ stores only time and level in a ring buffer, the port read
+# and the callback are executed later by micropython.schedule, so in the
+# callback you can use i2c, print and allocate
+#
+#           _____
+#     A0  |1    16| Vcc
+#     A1  |2    15| SDA
+#     A2  |3    14| SCL
+#  P0/IO0 |4    13| INT
+#  P1/IO1 |5    12| P7/IO7
+#  P2/IO2 |6    11| P6/IO6
+#  P3/IO3 |7    10| P5/IO5
+#     GND |8____ 9| P4/IO4
+#
+# Porting of PCF8574 library for Arduino
+# https://www.mischianti.org/2019/01/02/pcf8574-i2c-digital-i-o-expander-fast-easy-usage/
+#
+
+from machine import Pin
+import utime
+from PCF8574 import PCF8574
+
+pcf = PCF8574(0x38, sda=21, scl=22)
+
+
+def callback(ticks_us, level, port):
+    print("Time: {} level: {} port: {}".format(ticks_us, level, bin(port)))
+
+
+events = pcf.attach_event_handler(18, callback, size=32)
+
+pcf.Pin(PCF8574.P0, Pin.IN)
+
+pcf.begin()
+
+while True:
+    utime.sleep_ms(1000)
+    print("Overflows: {} Coalesced: {}".format(events.overflows, events.coalesced))
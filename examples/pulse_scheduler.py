@@ -0,0 +1,52 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# Website: www.mischianti.org
+# VERSION: 0.0.2
+#
+# Description:
+# timed outputs without blocking the loop:
+# a 250ms pulse on P3 every 2 seconds and P7 blinking every 500ms,
+# P0 follows P1 (button): in timer mode the other writes to the expander
+# are done inside `with scheduler:` so the service can't interrupt them
+#
+#           _____
+#     A0  |1    16| Vcc
+#     A1  |2    15| SDA
+#     A2  |3    14| SCL
+#  P0/IO0 |4    13| INT
+#  P1/IO1 |5    12| P7/IO7
+#  P2/IO2 |6    11| P6/IO6
+#  P3/IO3 |7    10| P5/IO5
+#     GND |8____ 9| P4/IO4
+#
+# Porting of PCF8574 library for Arduino
+# https://www.mischianti.org/2019/01/02/pcf8574-i2c-digital-i-o-expander-fast-easy-usage/
+#
+
+from machine import Pin
+import utime
+from PCF8574 import PCF8574, P0, P1, P3, P7
+
+pcf = PCF8574(0x38, sda=21, scl=22)
+
+pcf.Pin(P0, Pin.OUT)
+pcf.Pin(P1, Pin.IN, Pin.PULL_UP)
+pcf.Pin(P3, Pin.OUT)
+pcf.Pin(P7, Pin.OUT)
+
+pcf.begin()
+
+scheduler = pcf.pulse_scheduler()
+scheduler.blink(P7, 500)
+scheduler.start(period_ms=10)
+
+last_pulse = utime.ticks_ms()
+while True:
+    if utime.ticks_diff(utime.ticks_ms(), last_pulse) >= 2000:
+        last_pulse = utime.ticks_ms()
+        scheduler.pulse(P3, 250)
+    with scheduler:
+        pcf.digital_write(P0, pcf.digital_read(P1))
+    utime.sleep_ms(50)
@@ -0,0 +1,19 @@
+# MicroPython freeze manifest for the PCF8574 library.
+#
+# Add it to the manifest of your board:
+#   include("path/to/PCF8574_micropython_library/manifest.py")
+# or, if the port has the native emitter enabled, with the viper helpers:
+#   include("path/to/PCF8574_micropython_library/manifest.py", native=True)
+
+metadata(description="PCF8574 i2c digital expander", version="0.0.2")
+
+module("PCF8574.py", base_path="src")
+module("PCF8574_bus.py", base_path="src")
+module("PCF8574_group.py", base_path="src")
+module("PCF8574_events.py", base_path="src")
+module("PCF8574_breaker.py", base_path="src")
+module("PCF8574_capture.py", base_path="src")
+module("PCF8574_scheduler.py", base_path="src")
+
+if options.native:
+    module("PCF8574_native.py", base_path="src")
@@ -5,7 +5,8 @@ from setuptools import setup
 setup(
     name="pcf8574-library",
     package_dir={'': 'src'},
-    py_modules=["PCF8574"],
+    py_modules=["PCF8574", "PCF8574_native", "PCF8574_bus", "PCF8574_linux", "PCF8574_group", "PCF8574_events",
+                "PCF8574_breaker", "PCF8574_capture", "PCF8574_scheduler"],
     version="0.0.2",
     description="PCF8574 micropython library. i2c digital expander for Arduino, Raspberry Pi Pico and rp2040 boards, esp32, SMT32 and ESP8266",
     long_description="PCF8574 micropython library. i2c digital expander for Arduino, Raspberry Pi Pico and rp2040 boards, esp32, SMT32 and ESP8266. Can read write digital values with only 2 wire. Very simple to use",
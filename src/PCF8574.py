@@ -43,48 +43,145 @@
 # THE SOFTWARE.
 #
 
-from machine import Pin, I2C
-import utime
+try:
+    from machine import Pin, I2C
+except ImportError:
+    # Linux (CPython): no machine module, a bus backend must be passed to the
+    # constructor and only the constants used to set the pin mode are needed
+    class Pin:
+        IN = 1
+        OUT = 3
+        PULL_UP = 2
+        PULL_DOWN = 1
+        IRQ_FALLING = 2
+        IRQ_RISING = 1
+
+        def __init__(self, *args, **kwargs):
+            raise NotImplementedError('machine.Pin not available, interrupts need a MicroPython board')
+
+    I2C = None
+
+try:
+    import utime
+except ImportError:
+    import time
+
+    # Same wrap around of the MicroPython ticks (30 bit)
+    _TICKS_PERIOD = 1 << 30
+    _TICKS_MAX = _TICKS_PERIOD - 1
+    _TICKS_HALF_PERIOD = _TICKS_PERIOD >> 1
+
+    class utime:
+        @staticmethod
+        def ticks_ms():
+            return int(time.monotonic() * 1000) & _TICKS_MAX
+
+        @staticmethod
+        def ticks_us():
+            return int(time.monotonic() * 1000000) & _TICKS_MAX
+
+        @staticmethod
+        def ticks_add(ticks, delta):
+            return (ticks + delta) & _TICKS_MAX
+
+        @staticmethod
+        def ticks_diff(ticks1, ticks2):
+            return ((ticks1 - ticks2 + _TICKS_HALF_PERIOD) & _TICKS_MAX) - _TICKS_HALF_PERIOD
+
+        @staticmethod
+        def sleep_ms(ms):
+            time.sleep(ms / 1000)
+
+        @staticmethod
+        def sleep_us(us):
+            time.sleep(us / 1000000)
+
+try:
+    from micropython import const, schedule
+except ImportError:
+    def const(value):
+        return value
+
+    def schedule(func, arg):
+        func(arg)
+
+from PCF8574_bus import I2CBus, MachineI2CBus
+
+# Loops over the pins/samples: use the native/viper compiled versions when the
+# port supports them, fall back to the pure python ones otherwise. The single
+# bit operations stay inline, a call costs more than the operation itself.
+def _py_pack_bits(values, width):
+    result = 0
+    for i in range(width):
+        if values[i]:
+            result |= 1 << i
+    return result
+
 
+def _py_unpack_bits(value, width, out):
+    for i in range(width):
+        out[i] = (value >> i) & 1
+    return out
 
-class Logger:
-    def __init__(self, enable_debug):
-        self.enable_debug = enable_debug
-        self.name = ''
 
-    def debug(self, msg, *args):
-        if self.enable_debug:
-            print(self.name, ' DEBUG ', msg, *args)
+def _py_find_change(buf, start, end, wide, last):
+    # Index of the first sample in start..end-1 different from last, end if none
+    i = start
+    while i < end:
+        value = buf[i << 1] | (buf[(i << 1) + 1] << 8) if wide else buf[i]
+        if value != last:
+            return i
+        i += 1
+    return end
 
-    def info(self, msg, *args):
-        if self.enable_debug:
-            print(self.name, ' INFO ', msg, *args)
 
-    def error(self, msg, *args):
-        if self.enable_debug:
-            print(self.name, ' ERROR ', msg, *args)
+try:
+    from PCF8574_native import pack_bits as _pack_bits, unpack_bits as _unpack_bits, find_change as _find_change
+except (ImportError, SyntaxError, ValueError):
+    _pack_bits = _py_pack_bits
+    _unpack_bits = _py_unpack_bits
+    _find_change = _py_find_change
 
-    def getLogger(self, name):
-        self.name = name
-        return Logger(self.enable_debug)
 
+# Set to 1 to print debug messages, with 0 the debug code is removed by the compiler
+_DEBUG = const(0)
 
-logging = Logger(False)
+DEBOUNCE_LATENCY = const(100)
 
-logger = logging.getLogger(__name__)
+P0 = const(0)
+P1 = const(1)
+P2 = const(2)
+P3 = const(3)
+P4 = const(4)
+P5 = const(5)
+P6 = const(6)
+P7 = const(7)
 
-DEBOUNCE_LATENCY = 100
+# PCF8575 names the second port P10..P17
+P10 = const(8)
+P11 = const(9)
+P12 = const(10)
+P13 = const(11)
+P14 = const(12)
+P15 = const(13)
+P16 = const(14)
+P17 = const(15)
+
+# DigitalInput attributes, named as the pins of the chip (P10..P17 on PCF8575)
+_PIN_NAMES = ('p0', 'p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7',
+              'p10', 'p11', 'p12', 'p13', 'p14', 'p15', 'p16', 'p17')
+
+
+# Port value in buf, low byte first (P00..P07 then P10..P17 on PCF8575)
+def _fill_port(buf, value):
+    for i in range(len(buf)):
+        buf[i] = (value >> (i << 3)) & 0xFF
 
-P0 = 0
-P1 = 1
-P2 = 2
-P3 = 3
-P4 = 4
-P5 = 5
-P6 = 6
-P7 = 7
 
 class PCF8574:
+    # Number of pins of the port, all the masks are ints of this width
+    PORT_WIDTH = 8
+
     P0 = 0
     P1 = 1
     P2 = 2
@@ -95,127 +192,189 @@ class PCF8574:
     P7 = 7
 
     def __init__(self, address, i2c=None, i2c_id=0, sda=None, scl=None, interrupt_pin=None, interrupt_callback=None):
-        if i2c:
-            self._i2c = i2c
+        if isinstance(i2c, I2CBus):
+            self._bus = i2c
+        elif i2c:
+            self._bus = MachineI2CBus(i2c)
         elif sda and scl:
-            self._i2c = I2C(i2c_id, scl=Pin(scl), sda=Pin(sda))
+            if I2C is None:
+                raise ValueError('machine.I2C not available, pass a bus backend as i2c')
+            self._bus = MachineI2CBus(I2C(i2c_id, scl=Pin(scl), sda=Pin(sda)))
         else:
             raise ValueError('Either i2c or sda and scl must be provided')
 
         self._address = address
+        # Preallocated transfer buffer: no allocation on read and write
+        self._buf = bytearray(self.PORT_WIDTH >> 3)
+        # Mode masks, bit n is the pin n
+        self.write_mode = 0
+        self.write_mode_up = 0
+        self.read_mode = 0
+        self.read_mode_pull_down = 0
+        self.read_mode_pull_up = 0
 
-        self._interrupt_pin = None
-        self._interrupt_callback = None
+        # (interrupt_pin, callback, trigger_event, hard) when attached
+        self._interrupt = None
+        # CircuitBreaker when an error policy is set
+        self._breaker = None
+        self._events = None
         self.irq_pin = None
 
         if interrupt_pin is not None and interrupt_callback is not None:
             self.attach_interrupt(interrupt_pin, interrupt_callback)
-        # self._interrupt_pin = interrupt_pin
-        # self._interrupt_callback = interrupt_callback
-
-        self.encoder_pins = [False] * 8
 
-        self.write_mode = 0
-        self.read_mode = 0
-        self.read_mode_pull_down = 0
-        self.read_mode_pull_up = 0
-        self.write_mode_up = 0
-        self.last_read_millis = utime.ticks_ms()  # Change this line
-        self.reset_initial = 0
+        self.last_read_millis = utime.ticks_ms()
         self.initial_buffer = 0
 
         self.byte_buffered = 0
         self.write_byte_buffered = 0
         self.encoder_values = 0
 
-        if self._i2c.scan().count(address) == 0:
+        if not self._bus.probe(address):
             raise OSError('PCF8574 not found at I2C address {:#x}'.format(address))
 
-    def attach_interrupt(self, interrupt_pin, callback, trigger_event=Pin.IRQ_FALLING):
-        self._interrupt_pin = interrupt_pin
-        self._interrupt_callback = callback
-
+    def attach_interrupt(self, interrupt_pin, callback, trigger_event=Pin.IRQ_FALLING, hard=False):
         self.irq_pin = Pin(interrupt_pin, Pin.IN, Pin.PULL_UP)
-        self.irq_pin.irq(handler=callback, trigger=trigger_event)
+        self._interrupt = (interrupt_pin, callback, trigger_event, hard)
+        if hard:
+            self.irq_pin.irq(handler=callback, trigger=trigger_event, hard=True)
+        else:
+            self.irq_pin.irq(handler=callback, trigger=trigger_event)
+
+    # Built-in ISR safe handler: the hard IRQ only stores ticks_us and level of
+    # the interrupt pin in a preallocated ring buffer, the port read and the
+    # callback(ticks_us, level, port) calls are deferred with micropython.schedule,
+    # see PCF8574_events.py (imported only when used)
+    def attach_event_handler(self, interrupt_pin, callback, size=16, trigger_event=Pin.IRQ_FALLING):
+        from PCF8574_events import InterruptEvents
+
+        self._events = InterruptEvents(self, callback, size)
+        self.attach_interrupt(interrupt_pin, self._events.isr, trigger_event, True)
+        return self._events
+
+    @property
+    def events(self):
+        return self._events
 
     def detach_interrupt(self):
-        if self._interrupt_pin is not None and self._interrupt_callback is not None:
+        if self._interrupt is not None:
             self.irq_pin.irq(handler=None)
-            # self._interrupt_pin = None
 
     def reattach_interrupt(self):
-        if self._interrupt_pin is not None and self._interrupt_callback is not None:
-            self.attach_interrupt(self._interrupt_pin, self._interrupt_callback)
+        if self._interrupt is not None:
+            self.attach_interrupt(*self._interrupt)
 
     def begin(self):
         # Check if there are pins to set low
         if self.write_mode > 0 or self.read_mode > 0:
-            logger.debug(
-                'Begin with write_mode: {} and read_mode: {}'.format(bin(self.write_mode), bin(self.read_mode)))
-            self.reset_initial = self.write_mode_up | self.read_mode_pull_up
             self.initial_buffer = self.write_mode_up | self.read_mode_pull_up
             self.byte_buffered = self.initial_buffer
             self.write_byte_buffered = self.write_mode_up
-            logger.debug(
-                'Reset initial: {} and initial buffer: {}'.format(bin(self.reset_initial), bin(self.initial_buffer)))
-
-            byte_to_send = (self.write_byte_buffered & self.write_mode) | (self.reset_initial & self.read_mode)
-            logger.debug('Byte to send: {}'.format(bin(byte_to_send)))
-            nack = self._i2c.writeto(self._address, bytearray([byte_to_send]))
-            if not nack:
-                logger.error('Error writing to PCF8574')
+
+            byte_to_send = (self.write_byte_buffered & self.write_mode) | (self.initial_buffer & self.read_mode)
+            if _DEBUG:
+                print('PCF8574 DEBUG begin write_mode: {} read_mode: {} byte to send: {}'.format(
+                    bin(self.write_mode), bin(self.read_mode), bin(byte_to_send)))
+            # writeto returns the number of ACKs received, an address NACK raises OSError
+            try:
+                acks = self._write_port(byte_to_send)
+            except OSError:
+                acks = 0
+            if acks is not None and acks < len(self._buf):
+                if _DEBUG:
+                    print('PCF8574 ERROR writing to PCF8574')
                 return False
             self.digital_write_all_byte(byte_to_send)
 
         # Initialize last read
         self.last_read_millis = utime.ticks_ms()
 
-        if self._interrupt_pin is not None and self._interrupt_callback is not None:
-            self.attach_interrupt(self._interrupt_pin, self._interrupt_callback)
+        if self._interrupt is not None:
+            self.attach_interrupt(*self._interrupt)
 
         return True
 
     def Pin(self, pin, mode, output_start=None):
+        if not 0 <= pin < self.PORT_WIDTH:
+            raise ValueError('Invalid pin')
+
         if mode == Pin.OUT:
-            self.write_mode = self.write_mode | 1 << pin
+            self.write_mode |= 1 << pin
             if output_start == 1:
-                self.write_mode_up = self.write_mode_up | 1 << pin
+                self.write_mode_up |= 1 << pin
 
-            self.read_mode = self.read_mode & ~(1 << pin)
-            self.read_mode_pull_down = self.read_mode_pull_down & ~(1 << pin)
-            self.read_mode_pull_up = self.read_mode_pull_up & ~(1 << pin)
+            self.read_mode &= ~(1 << pin)
+            self.read_mode_pull_down &= ~(1 << pin)
+            self.read_mode_pull_up &= ~(1 << pin)
 
         elif mode == Pin.IN and (output_start is None or output_start == Pin.PULL_DOWN):
-            self.write_mode = self.write_mode & ~(1 << pin)
+            self.write_mode &= ~(1 << pin)
 
-            self.read_mode = self.read_mode | 1 << pin
-            self.read_mode_pull_down = self.read_mode_pull_down | 1 << pin
-            self.read_mode_pull_up = self.read_mode_pull_up & ~(1 << pin)
+            self.read_mode |= 1 << pin
+            self.read_mode_pull_down |= 1 << pin
+            self.read_mode_pull_up &= ~(1 << pin)
 
         elif mode == Pin.IN and output_start == Pin.PULL_UP:
-            self.write_mode = self.write_mode & ~(1 << pin)
+            self.write_mode &= ~(1 << pin)
 
-            self.read_mode = self.read_mode | 1 << pin
-            self.read_mode_pull_down = self.read_mode_pull_down & ~(1 << pin)
-            self.read_mode_pull_up = self.read_mode_pull_up | 1 << pin
+            self.read_mode |= 1 << pin
+            self.read_mode_pull_down &= ~(1 << pin)
+            self.read_mode_pull_up |= 1 << pin
 
         else:
             raise ValueError('Invalid mode')
 
-        logger.debug('Pin: {}, Mode: {}, Output Start: {}'.format(pin, mode, output_start))
-        # debug Write mode in binary format
-        logger.debug('Write Mode: {}, Read Mode: {}, Read Mode Pull Down: {}, Read Mode Pull Up: {}'.format(
-            bin(self.write_mode), bin(self.read_mode), bin(self.read_mode_pull_down), bin(self.read_mode_pull_up)))
-
-    # def encoder(self, pinA, pinB):
-    #     # self.set_pin_mode(pinA, 'INPUT_PULLUP')
-    #     # self.set_pin_mode(pinB, 'INPUT_PULLUP')
-    #     #
-    #     self.Pin(pinA, Pin.IN, Pin.PULL_UP)
-    #     self.Pin(pinB, Pin.IN, Pin.PULL_UP)
-    #
-    #     self.encoder_pins[pinA] = True
-    #     self.encoder_pins[pinB] = True
+        if _DEBUG:
+            print('PCF8574 DEBUG Pin: {}, Mode: {}, Output Start: {}'.format(pin, mode, output_start))
+            print('PCF8574 DEBUG Write Mode: {}, Read Mode: {}, Read Mode Pull Down: {}, Read Mode Pull Up: {}'.format(
+                bin(self.write_mode), bin(self.read_mode), bin(self.read_mode_pull_down), bin(self.read_mode_pull_up)))
+
+    # All the port is moved in one transaction, low byte first (P00..P07 then P10..P17 on PCF8575)
+    def _write_port(self, value):
+        buf = self._buf
+        _fill_port(buf, value)
+        if self._breaker is None:
+            return self._bus.writeto(self._address, buf)
+        return self._breaker.write(self._bus, self._address, buf)
+
+    # Write value (the input pins high) and read the port back in one combined transfer
+    def _read_port(self, value):
+        buf = self._buf
+        if self._breaker is None:
+            _fill_port(buf, value)
+            self._bus.writeto_then_readfrom(self._address, buf, buf)
+            return int.from_bytes(buf, 'little')
+        breaker = self._breaker
+        value = breaker.read(self._bus, self._address, buf, value)
+        if value is None:
+            # Never read: the inputs at rest, so no change is detected
+            return self.read_mode_pull_up
+        if breaker.pending_write and breaker.is_available():
+            # The device is back: the outputs changed while it was skipped are written now
+            breaker.pending_write = False
+            self.write_buffer()
+        return value
+
+    # Retries with exponential backoff on bus errors and circuit breaker: after
+    # failure_threshold failed operations the device is skipped for cooldown_ms,
+    # reads return the last value read and writes are only buffered.
+    # With a policy set the bus errors are not raised, see status() and
+    # PCF8574_breaker.py (imported only when used).
+    def set_error_policy(self, retries=2, backoff_us=200, failure_threshold=3, cooldown_ms=1000):
+        from PCF8574_breaker import CircuitBreaker
+
+        self._breaker = CircuitBreaker(retries, backoff_us, failure_threshold, cooldown_ms)
+
+    def clear_error_policy(self):
+        self._breaker = None
+
+    def status(self):
+        if self._breaker is None:
+            return None
+        return self._breaker.status()
+
+    def is_available(self):
+        return self._breaker is None or self._breaker.is_available()
 
     def get_bit(self, n, position):
         return (n >> position) & 1
@@ -223,23 +382,14 @@ class PCF8574:
     def read_buffer(self, force=False):
         current_millis = utime.ticks_ms()
         if utime.ticks_diff(current_millis, self.last_read_millis) > DEBOUNCE_LATENCY or force:
-            logger.debug('Read buffer')
-            self._i2c.writeto(self._address, bytearray([self.read_mode]))
-            i_input = int.from_bytes(self._i2c.readfrom(self._address, 1), 'little')
-            logger.debug('Read: {}'.format(bin(i_input)))
-
-            logger.debug('Read mode pd: {}'.format(bin(self.read_mode_pull_down)))
-            logger.debug('Read mode pu: {}'.format(bin(self.read_mode_pull_up)))
+            i_input = self._read_port(self._read_value())
+            if _DEBUG:
+                print('PCF8574 DEBUG Read: {}'.format(bin(i_input)))
 
             if (i_input & self.read_mode_pull_down) > 0 and (~i_input & self.read_mode_pull_up) > 0:
-                logger.debug('Change detected')
-
-                logger.debug('i_input & self.read_mode_pull_down: {}'.format(bin((i_input & self.read_mode_pull_down))))
-                logger.debug('~i_input & self.read_mode_pull_up: {}'.format(bin((~i_input & self.read_mode_pull_up))))
-
-                logger.debug('Byte buffered: {}'.format(bin(self.byte_buffered)))
                 self.byte_buffered = (self.byte_buffered & ~self.read_mode) | i_input
-                logger.debug('Byte buffered: {}'.format(bin(self.byte_buffered)))
+                if _DEBUG:
+                    print('PCF8574 DEBUG Change detected, byte buffered: {}'.format(bin(self.byte_buffered)))
             self.last_read_millis = current_millis
 
     # def digital_read(self, pin, force=False):
@@ -247,36 +397,28 @@ class PCF8574:
     #     return (self.byte_buffered & (1 << pin)) > 0
 
     def digital_read(self, pin, force_read_now=False):
-        value = 1 if (1 << pin & self.read_mode_pull_up) else 0
+        mask = 1 << pin
+        value = 1 if (mask & self.read_mode_pull_up) else 0
 
-        if (value == 1 and (1 << pin & self.read_mode_pull_down & self.byte_buffered)) or \
-                (value == 0 and (1 << pin & self.read_mode_pull_up & ~self.byte_buffered)):
+        if (value == 1 and (mask & self.read_mode_pull_down & self.byte_buffered)) or \
+                (value == 0 and (mask & self.read_mode_pull_up & ~self.byte_buffered)):
             # The pin was already set high or low
-            if 1 << pin & self.byte_buffered:
-                value = 1
-            else:
-                value = 0
+            value = 1 if mask & self.byte_buffered else 0
         elif force_read_now or utime.ticks_diff(utime.ticks_ms(), self.last_read_millis) > DEBOUNCE_LATENCY:
             # Read from buffer
-            self._i2c.writeto(self._address, bytearray([self.read_mode]))
+            i_input = self._read_port(self._read_value())
             self.last_read_millis = utime.ticks_ms()
-            incoming = self._i2c.readfrom(self._address, 1)
-            if incoming:
-                i_input = incoming[0]
-                if (self.read_mode_pull_down & i_input) or (self.read_mode_pull_up & ~i_input):
-                    # Change detected
-                    self.byte_buffered = (self.byte_buffered & ~self.read_mode) | i_input
-                    if 1 << pin & self.byte_buffered:
-                        value = 1
-                    else:
-                        value = 0
+            if (self.read_mode_pull_down & i_input) or (self.read_mode_pull_up & ~i_input):
+                # Change detected
+                self.byte_buffered = (self.byte_buffered & ~self.read_mode) | i_input
+                value = 1 if mask & self.byte_buffered else 0
 
         # If HIGH set to low to read buffer only one time
-        if 1 << pin & self.read_mode_pull_down and value == 1:
-            self.byte_buffered ^= 1 << pin
-        elif 1 << pin & self.read_mode_pull_up and value == 0:
-            self.byte_buffered ^= 1 << pin
-        elif 1 << pin & self.write_byte_buffered:
+        if mask & self.read_mode_pull_down and value == 1:
+            self.byte_buffered ^= mask
+        elif mask & self.read_mode_pull_up and value == 0:
+            self.byte_buffered ^= mask
+        elif mask & self.write_byte_buffered:
             value = 1
 
         return value
@@ -290,74 +432,50 @@ class PCF8574:
 
     def write_buffer(self):
         byte_to_send = (self.write_byte_buffered & self.write_mode) | (self.write_mode_up & ~self.write_mode)
-        self._i2c.writeto(self._address, bytearray([byte_to_send]))
+        self._write_port(byte_to_send)
+
+    # Value to write before reading: the inputs high (a pin written 0 is held
+    # low by the quasi-bidirectional port), the outputs as in write_buffer
+    def _read_value(self):
+        return self.read_mode | (self.write_byte_buffered & self.write_mode) | (self.write_mode_up & ~self.write_mode)
 
     def digital_write_all_byte(self, allpins):
-        self._i2c.writeto(self._address,
-                          bytearray([(allpins & self.write_mode) | (self.reset_initial & self.read_mode)]))
+        self._write_port((allpins & self.write_mode) | (self.initial_buffer & self.read_mode))
 
         self.byte_buffered = (allpins & self.write_mode) | (self.initial_buffer & self.read_mode)
 
-    def digital_read_all(self):
-        digital_input = DigitalInput()
-
-        self._i2c.writeto(self._address, bytearray([self.read_mode]))
+    def _read_all(self):
+        i_input = self._read_port(self._read_value())
         self.last_read_millis = utime.ticks_ms()
-        incoming = self._i2c.readfrom(self._address, 1)
-        if incoming:
-            i_input = incoming[0]
-            if (self.read_mode_pull_down & i_input) or (self.read_mode_pull_up & ~i_input):
-                # Change detected
-                self.byte_buffered = (self.byte_buffered & ~self.read_mode) | i_input
+        if (self.read_mode_pull_down & i_input) or (self.read_mode_pull_up & ~i_input):
+            # Change detected
+            self.byte_buffered = (self.byte_buffered & ~self.read_mode) | i_input
 
-        if 1 << 0 & self.read_mode:
-            digital_input.p0 = 1 if (self.byte_buffered & (1 << 0)) != 0 else 0
-        if 1 << 1 & self.read_mode:
-            digital_input.p1 = 1 if (self.byte_buffered & (1 << 1)) != 0 else 0
-        if 1 << 2 & self.read_mode:
-            digital_input.p2 = 1 if (self.byte_buffered & (1 << 2)) != 0 else 0
-        if 1 << 3 & self.read_mode:
-            digital_input.p3 = 1 if (self.byte_buffered & (1 << 3)) != 0 else 0
-        if 1 << 4 & self.read_mode:
-            digital_input.p4 = 1 if (self.byte_buffered & (1 << 4)) != 0 else 0
-        if 1 << 5 & self.read_mode:
-            digital_input.p5 = 1 if (self.byte_buffered & (1 << 5)) != 0 else 0
-        if 1 << 6 & self.read_mode:
-            digital_input.p6 = 1 if (self.byte_buffered & (1 << 6)) != 0 else 0
-        if 1 << 7 & self.read_mode:
-            digital_input.p7 = 1 if (self.byte_buffered & (1 << 7)) != 0 else 0
-
-        if 1 << 0 & self.write_mode:
-            digital_input.p0 = 1 if (self.write_byte_buffered & (1 << 0)) else 0
-        if 1 << 1 & self.write_mode:
-            digital_input.p1 = 1 if (self.write_byte_buffered & (1 << 1)) else 0
-        if 1 << 2 & self.write_mode:
-            digital_input.p2 = 1 if (self.write_byte_buffered & (1 << 2)) else 0
-        if 1 << 3 & self.write_mode:
-            digital_input.p3 = 1 if (self.write_byte_buffered & (1 << 3)) else 0
-        if 1 << 4 & self.write_mode:
-            digital_input.p4 = 1 if (self.write_byte_buffered & (1 << 4)) else 0
-        if 1 << 5 & self.write_mode:
-            digital_input.p5 = 1 if (self.write_byte_buffered & (1 << 5)) else 0
-        if 1 << 6 & self.write_mode:
-            digital_input.p6 = 1 if (self.write_byte_buffered & (1 << 6)) else 0
-        if 1 << 7 & self.write_mode:
-            digital_input.p7 = 1 if (self.write_byte_buffered & (1 << 7)) else 0
+        value = (self.byte_buffered & self.read_mode) | (self.write_byte_buffered & self.write_mode)
 
         self.byte_buffered = (self.initial_buffer & self.read_mode) | (self.byte_buffered & ~self.read_mode)
 
+        return value
+
+    def digital_read_all(self):
+        digital_input = DigitalInput(self.PORT_WIDTH)
+        digital_input.from_int(self._read_all())
         return digital_input
 
     def digital_read_all_byte(self):
-        return self.digital_read_all().to_byte()
+        # All the port in one int (16 bit for PCF8575)
+        return self._read_all()
 
     def digital_read_all_array(self):
-        return self.digital_read_all().to_array()
+        return _unpack_bits(self._read_all(), self.PORT_WIDTH, [0] * self.PORT_WIDTH)
 
     def digital_write_all_array(self, all_pins_array):
-        self.write_byte_buffered = (all_pins_array[0] << 0) | (all_pins_array[1] << 1) | (all_pins_array[2] << 2) | \
-                                   (all_pins_array[3] << 3) | (all_pins_array[4] << 4) | (all_pins_array[5] << 5) | \
-                                   (all_pins_array[6] << 6) | (all_pins_array[7] << 7)
+        # A shorter array (8 values on PCF8575) writes only the first pins
+        width = len(all_pins_array)
+        if width > self.PORT_WIDTH:
+            raise ValueError('{} values for a {} pin port'.format(width, self.PORT_WIDTH))
+        mask = (1 << width) - 1
+        self.write_byte_buffered = (self.write_byte_buffered & ~mask) | _pack_bits(all_pins_array, width)
         self.write_buffer()
 
     def set_val(self, pin, value):
@@ -369,17 +487,40 @@ class PCF8574:
             self.byte_buffered = self.write_byte_buffered & ~(1 << pin)
 
     def digital_write_all(self, digital_input):
-        self.set_val(0, digital_input.p0)
-        self.set_val(1, digital_input.p1)
-        self.set_val(2, digital_input.p2)
-        self.set_val(3, digital_input.p3)
-        self.set_val(4, digital_input.p4)
-        self.set_val(5, digital_input.p5)
-        self.set_val(6, digital_input.p6)
-        self.set_val(7, digital_input.p7)
+        # An 8 pin DigitalInput on PCF8575 writes only P0..P7
+        width = len(digital_input)
+        if width > self.PORT_WIDTH:
+            raise ValueError('{} pin DigitalInput for a {} pin port'.format(width, self.PORT_WIDTH))
+        for pin in range(width):
+            self.set_val(pin, getattr(digital_input, _PIN_NAMES[pin]))
 
         return self.digital_write_all_byte(self.write_byte_buffered)
 
+    # Logic analyzer: sample all the port with burst reads and store only the
+    # changes, see PCF8574_capture.py (imported only when used)
+    def capture(self, size=256, duration_ms=1000, trigger_mask=0, trigger_value=None, pretrigger=0, burst=8,
+                timeout_ms=10000, capture=None):
+        from PCF8574_capture import Capture
+
+        if capture is None:
+            capture = Capture(self.PORT_WIDTH, size, burst)
+        # The burst reads don't write the port: release the inputs first
+        self._write_port(self._read_value())
+        return capture.run(self._bus, self._address, duration_ms, trigger_mask, trigger_value, pretrigger,
+                           timeout_ms)
+
+    # Timed one shot and periodic output transitions, see PCF8574_scheduler.py (imported only when used)
+    def pulse_scheduler(self, size=16):
+        from PCF8574_scheduler import PulseScheduler
+
+        return PulseScheduler(self, size)
+
+    # Pins read and written as one int, see PCF8574_group.py (imported only when used)
+    def pin_group(self, pins, gray=False):
+        from PCF8574_group import PinGroup
+
+        return PinGroup(self, pins, gray)
+
     def read_encoder_value_sequence_reduced(self, pin_a, pin_b, encoder_value, reverse_rotation=False):
         self.detach_interrupt()
 
@@ -444,50 +585,91 @@ class PCF8574:
         return changed, encoder_value
 
 
+class PCF8574A(PCF8574):
+    # Same IC with address map 0x38-0x3f
+    pass
+
+
+#
+# PCF8575 16 bit version
+#
+#           _____
+#    INT  |1    24| Vcc
+#     A1  |2    23| SDA
+#     A2  |3    22| SCL
+#    P00  |4    21| A0
+#    P01  |5    20| P17
+#    P02  |6    19| P16
+#    P03  |7    18| P15
+#    P04  |8    17| P14
+#    P05  |9    16| P13
+#    P06  |10   15| P12
+#    P07  |11   14| P11
+#    GND  |12___13| P10
+#
+class PCF8575(PCF8574):
+    PORT_WIDTH = 16
+
+    P10 = 8
+    P11 = 9
+    P12 = 10
+    P13 = 11
+    P14 = 12
+    P15 = 13
+    P16 = 14
+    P17 = 15
+
+
 class DigitalInput:
-    def __init__(self):
-        self.p0 = 0
-        self.p1 = 0
-        self.p2 = 0
-        self.p3 = 0
-        self.p4 = 0
-        self.p5 = 0
-        self.p6 = 0
-        self.p7 = 0
+    def __init__(self, width=8):
+        self._width = width
+        for pin in range(width):
+            setattr(self, _PIN_NAMES[pin], 0)
+
+    def __len__(self):
+        return self._width
 
     def get(self):
-        return [self.p0, self.p1, self.p2, self.p3, self.p4, self.p5, self.p6, self.p7]
+        return self.to_array()
 
     def set(self, pin, value):
-        if pin == 0:
-            self.p0 = value
-        elif pin == 1:
-            self.p1 = value
-        elif pin == 2:
-            self.p2 = value
-        elif pin == 3:
-            self.p3 = value
-        elif pin == 4:
-            self.p4 = value
-        elif pin == 5:
-            self.p5 = value
-        elif pin == 6:
-            self.p6 = value
-        elif pin == 7:
-            self.p7 = value
+        if 0 <= pin < self._width:
+            setattr(self, _PIN_NAMES[pin], value)
 
     def set_all(self, value):
-        self.p0 = value[0]
-        self.p1 = value[1]
-        self.p2 = value[2]
-        self.p3 = value[3]
-        self.p4 = value[4]
-        self.p5 = value[5]
-        self.p6 = value[6]
-        self.p7 = value[7]
+        for pin in range(self._width):
+            setattr(self, _PIN_NAMES[pin], value[pin])
+
+    # Unrolled: called by every digital_read_all, a loop of setattr is slower
+    def from_int(self, value):
+        self.p0 = value & 1
+        self.p1 = (value >> 1) & 1
+        self.p2 = (value >> 2) & 1
+        self.p3 = (value >> 3) & 1
+        self.p4 = (value >> 4) & 1
+        self.p5 = (value >> 5) & 1
+        self.p6 = (value >> 6) & 1
+        self.p7 = (value >> 7) & 1
+        if self._width > 8:
+            self.p10 = (value >> 8) & 1
+            self.p11 = (value >> 9) & 1
+            self.p12 = (value >> 10) & 1
+            self.p13 = (value >> 11) & 1
+            self.p14 = (value >> 12) & 1
+            self.p15 = (value >> 13) & 1
+            self.p16 = (value >> 14) & 1
+            self.p17 = (value >> 15) & 1
+
+    def to_int(self):
+        value = self.p0 | self.p1 << 1 | self.p2 << 2 | self.p3 << 3 | self.p4 << 4 | self.p5 << 5 | self.p6 << 6 | \
+            self.p7 << 7
+        if self._width > 8:
+            value |= self.p10 << 8 | self.p11 << 9 | self.p12 << 10 | self.p13 << 11 | self.p14 << 12 | \
+                self.p15 << 13 | self.p16 << 14 | self.p17 << 15
+        return value
 
     def to_byte(self):
-        return self.p0 | self.p1 << 1 | self.p2 << 2 | self.p3 << 3 | self.p4 << 4 | self.p5 << 5 | self.p6 << 6 | self.p7 << 7
+        return self.to_int()
 
     def to_array(self):
-        return [self.p0, self.p1, self.p2, self.p3, self.p4, self.p5, self.p6, self.p7]
+        return [getattr(self, _PIN_NAMES[pin]) for pin in range(self._width)]
@@ -0,0 +1,124 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Per device retry and circuit breaker state for PCF8574/PCF8575 (imported
+# by PCF8574.set_error_policy only when used).
+#
+# An operation makes at most retries + 1 attempts, so a dead device costs a
+# bounded time per call, and none while the breaker is open.
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+from PCF8574 import _fill_port, utime
+
+
+class CircuitBreaker:
+    def __init__(self, retries=2, backoff_us=200, failure_threshold=3, cooldown_ms=1000):
+        self.retries = retries
+        self.backoff_us = backoff_us
+        self.failure_threshold = failure_threshold
+        self.cooldown_ms = cooldown_ms
+        # Last value read, served while the device is skipped (None: never read)
+        self.cached_value = None
+        self.pending_write = False
+        self.reset()
+
+    def reset(self):
+        self.consecutive_failures = 0
+        self.errors = 0
+        self.retried = 0
+        self.skipped = 0
+        self.last_error = None
+        self._open_until = None
+
+    def is_open(self):
+        if self._open_until is None:
+            return False
+        if utime.ticks_diff(utime.ticks_ms(), self._open_until) >= 0:
+            # Cool-down elapsed: half open, the next operation tries the device once
+            return False
+        return True
+
+    def is_available(self):
+        # Closed: the last operation succeeded (half open is not available yet)
+        return self._open_until is None
+
+    def _attempts(self):
+        # Half open (after a trip): only one attempt
+        return 1 if self._open_until is not None else self.retries + 1
+
+    def _success(self):
+        self.consecutive_failures = 0
+        self._open_until = None
+
+    def _failure(self, error):
+        self.errors += 1
+        self.consecutive_failures += 1
+        self.last_error = error.args[0] if error.args else None
+        if self._open_until is not None or self.consecutive_failures >= self.failure_threshold:
+            self._open_until = utime.ticks_add(utime.ticks_ms(), self.cooldown_ms)
+
+    def _backoff(self, attempt):
+        self.retried += 1
+        if self.backoff_us:
+            utime.sleep_us(self.backoff_us << attempt)
+
+    def write(self, bus, address, buf):
+        if self.is_open():
+            self.skipped += 1
+            self.pending_write = True
+            return 0
+        attempts = self._attempts()
+        for attempt in range(attempts):
+            try:
+                acks = bus.writeto(address, buf)
+                if acks is not None and acks < len(buf):
+                    raise OSError(5)
+                self._success()
+                return acks
+            except OSError as error:
+                if attempt + 1 == attempts:
+                    self._failure(error)
+                else:
+                    self._backoff(attempt)
+        self.pending_write = True
+        return 0
+
+    def read(self, bus, address, buf, value):
+        if self.is_open():
+            self.skipped += 1
+            return self.cached_value
+        attempts = self._attempts()
+        for attempt in range(attempts):
+            try:
+                # Filled at every attempt, a failed transfer can leave anything in buf
+                _fill_port(buf, value)
+                bus.writeto_then_readfrom(address, buf, buf)
+                self._success()
+                self.cached_value = int.from_bytes(buf, 'little')
+                return self.cached_value
+            except OSError as error:
+                if attempt + 1 == attempts:
+                    self._failure(error)
+                else:
+                    self._backoff(attempt)
+        return self.cached_value
+
+    def status(self):
+        is_open = self.is_open()
+        return {
+            'available': self.is_available(),
+            'open': is_open,
+            'consecutive_failures': self.consecutive_failures,
+            'errors': self.errors,
+            'retried': self.retried,
+            'skipped': self.skipped,
+            'last_error': self.last_error,
+            'retry_in_ms': max(0, utime.ticks_diff(self._open_until, utime.ticks_ms())) if is_open else 0,
+        }
@@ -0,0 +1,59 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Bus backends used by PCF8574.
+#
+# PCF8574 needs only four operations from the bus: writeto, readfrom_into,
+# readfrom and probe. I2CBus defines them, MachineI2CBus wraps the
+# MicroPython machine.I2C, the Linux i2c-dev backend is in PCF8574_linux.py
+# (not needed on microcontrollers).
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+
+class I2CBus:
+    def writeto(self, address, buf):
+        raise NotImplementedError
+
+    def readfrom_into(self, address, buf):
+        raise NotImplementedError
+
+    def readfrom(self, address, nbytes):
+        buf = bytearray(nbytes)
+        self.readfrom_into(address, buf)
+        return buf
+
+    def writeto_then_readfrom(self, address, out_buf, in_buf):
+        self.writeto(address, out_buf)
+        self.readfrom_into(address, in_buf)
+
+    def probe(self, address):
+        try:
+            self.readfrom_into(address, bytearray(1))
+        except OSError:
+            return False
+        return True
+
+
+class MachineI2CBus(I2CBus):
+    def __init__(self, i2c):
+        self.i2c = i2c
+        # Fast path: the methods of machine.I2C are bound to the instance,
+        # so a call costs the same as a direct call to the I2C object
+        self.writeto = i2c.writeto
+        self.readfrom_into = i2c.readfrom_into
+        self.readfrom = i2c.readfrom
+
+    def writeto_then_readfrom(self, address, out_buf, in_buf):
+        # No stop condition after the write: repeated start before the read
+        self.i2c.writeto(address, out_buf, False)
+        self.i2c.readfrom_into(address, in_buf)
+
+    def probe(self, address):
+        return address in self.i2c.scan()
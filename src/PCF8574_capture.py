@@ -0,0 +1,203 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Logic analyzer capture mode for PCF8574/PCF8575.
+#
+#   capture = pcf.capture(size=512, duration_ms=2000, trigger_mask=1 << P0, pretrigger=16)
+#   capture.save_vcd('bounce.vcd')   # open it with GTKWave
+#
+# The whole port is sampled as fast as the bus allows with burst reads:
+# every byte (every 2 bytes on PCF8575) of a read transaction is a new
+# sample of all the pins. Only the changes are stored, as time from the
+# previous change (us) and port value, in arrays allocated by the
+# constructor, so the sampling loop doesn't allocate.
+#
+# The times of the samples of a burst are interpolated between the start
+# and the end of the transaction.
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+from array import array
+
+try:
+    import utime
+except ImportError:
+    from PCF8574 import utime
+
+from PCF8574 import _find_change
+
+
+class Capture:
+    def __init__(self, width=8, size=256, burst=8):
+        self.width = width
+        self.size = size
+        self._nbytes = width >> 3
+        # Time from the previous stored change in us and port value
+        self.deltas = array('I', [0] * size)
+        self.values = array('H' if width > 8 else 'B', [0] * size)
+        self._burst = bytearray(burst * self._nbytes)
+        self.count = 0
+        self.triggered = False
+        # Index of the trigger in deltas/values, -1 if not triggered
+        self.trigger_index = -1
+
+    def run(self, bus, address, duration_ms=1000, trigger_mask=0, trigger_value=None, pretrigger=0,
+            timeout_ms=10000):
+        if not 0 <= pretrigger < self.size:
+            raise ValueError('pretrigger must be lower than size')
+
+        deltas = self.deltas
+        values = self.values
+        buf = self._burst
+        wide = self._nbytes > 1
+        burst = len(buf) // self._nbytes
+        size = self.size
+        ticks_us = utime.ticks_us
+        ticks_ms = utime.ticks_ms
+        ticks_diff = utime.ticks_diff
+        ticks_add = utime.ticks_add
+
+        self.count = 0
+        self.triggered = False
+        self.trigger_index = -1
+
+        # Without trigger mask the capture starts immediately
+        triggered = trigger_mask == 0
+        if triggered:
+            self.trigger_index = 0
+        if trigger_value is not None:
+            trigger_value &= trigger_mask
+        # Before the trigger the changes go in a ring of pretrigger slots
+        ring_head = 0
+        ring_count = 0
+
+        count = 0
+        last_value = -1
+        last_ticks = ticks_us()
+        start_ms = ticks_ms()
+        trigger_ms = start_ms
+
+        while True:
+            before = ticks_us()
+            bus.readfrom_into(address, buf)
+            after = ticks_us()
+            elapsed = ticks_diff(after, before)
+
+            # The samples equal to the previous one are skipped by _find_change (native when available)
+            i = _find_change(buf, 0, burst, wide, last_value)
+            while i < burst:
+                value = buf[i << 1] | (buf[(i << 1) + 1] << 8) if wide else buf[i]
+                sample_ticks = ticks_add(before, elapsed * (i + 1) // burst)
+                delta = 0 if last_value < 0 else ticks_diff(sample_ticks, last_ticks)
+                changed = value ^ last_value if last_value >= 0 else 0
+                last_value = value
+                last_ticks = sample_ticks
+
+                store = True
+                if not triggered:
+                    if trigger_value is None:
+                        triggered = (changed & trigger_mask) != 0
+                    else:
+                        triggered = (value & trigger_mask) == trigger_value
+                    if triggered:
+                        count = self._unroll(ring_head, ring_count)
+                        self.trigger_index = count
+                        trigger_ms = ticks_ms()
+                    else:
+                        store = False
+                        if pretrigger:
+                            deltas[ring_head] = delta
+                            values[ring_head] = value
+                            ring_head = ring_head + 1 if ring_head + 1 < pretrigger else 0
+                            if ring_count < pretrigger:
+                                ring_count += 1
+
+                if store:
+                    deltas[count] = delta
+                    values[count] = value
+                    count += 1
+                    if count == size:
+                        break
+
+                i = _find_change(buf, i + 1, burst, wide, last_value)
+
+            now = ticks_ms()
+            if count == size:
+                break
+            if triggered and ticks_diff(now, trigger_ms) >= duration_ms:
+                break
+            if not triggered and ticks_diff(now, start_ms) >= timeout_ms:
+                count = self._unroll(ring_head, ring_count)
+                break
+
+        self.count = count
+        self.triggered = triggered
+        return self
+
+    def _unroll(self, ring_head, ring_count):
+        # Rotate in place the ring of the pretrigger changes, so the oldest is the first
+        if ring_count == 0:
+            return 0
+        start = ring_head % ring_count
+        if start:
+            self._reverse(0, start)
+            self._reverse(start, ring_count)
+            self._reverse(0, ring_count)
+        return ring_count
+
+    def _reverse(self, start, end):
+        deltas = self.deltas
+        values = self.values
+        end -= 1
+        while start < end:
+            deltas[start], deltas[end] = deltas[end], deltas[start]
+            values[start], values[end] = values[end], values[start]
+            start += 1
+            end -= 1
+
+    def changes(self):
+        # (time from the first stored change in us, port value)
+        offset = 0
+        for i in range(self.count):
+            if i:
+                offset += self.deltas[i]
+            yield offset, self.values[i]
+
+    def write_vcd(self, stream, names=None, module='pcf8574'):
+        width = self.width
+        if names is None:
+            names = ['P{}'.format(pin) if pin < 8 else 'P1{}'.format(pin - 8) for pin in range(width)]
+        codes = [chr(33 + pin) for pin in range(width)]
+
+        stream.write('$version PCF8574 micropython library $end\n')
+        stream.write('$timescale 1us $end\n')
+        stream.write('$scope module {} $end\n'.format(module))
+        for pin in range(width):
+            stream.write('$var wire 1 {} {} $end\n'.format(codes[pin], names[pin]))
+        stream.write('$upscope $end\n')
+        stream.write('$enddefinitions $end\n')
+
+        last_value = None
+        for offset, value in self.changes():
+            if last_value is None:
+                stream.write('#0\n$dumpvars\n')
+                for pin in range(width):
+                    stream.write('{}{}\n'.format((value >> pin) & 1, codes[pin]))
+                stream.write('$end\n')
+            else:
+                stream.write('#{}\n'.format(offset))
+                changed = value ^ last_value
+                for pin in range(width):
+                    if changed & (1 << pin):
+                        stream.write('{}{}\n'.format((value >> pin) & 1, codes[pin]))
+            last_value = value
+
+    def save_vcd(self, filename, names=None, module='pcf8574'):
+        with open(filename, 'w') as stream:
+            self.write_vcd(stream, names, module)
@@ -0,0 +1,120 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Ring buffer of the interrupts of the INT pin of PCF8574/PCF8575, filled by
+# a hard IRQ (imported by PCF8574.attach_event_handler only when used).
+#
+# Memory is allocated in the constructor only: the ISR doesn't allocate.
+# overflows counts the events lost with the buffer full, coalesced the
+# interrupts raised while a processing was already scheduled (they are
+# served by the same port read).
+#
+# The processing runs from micropython.schedule and can interrupt the main
+# code anywhere, also in the middle of a read or a write of the expander
+# (the transfer buffer and byte_buffered are shared): the reads and writes
+# of the main code must be done inside `with events:`, the processing is
+# skipped and scheduled again when the block ends.
+#
+#   with events:
+#       value = pcf.digital_read(P1)
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+from array import array
+
+from PCF8574 import schedule, utime
+
+
+class InterruptEvents:
+    def __init__(self, pcf, callback, size=16):
+        self._pcf = pcf
+        self._callback = callback
+        # One slot is always free to tell full from empty
+        self._size = size + 1
+        self._ticks = array('I', [0] * self._size)
+        self._levels = bytearray(self._size)
+        self._head = 0
+        self._tail = 0
+        self._scheduled = False
+        # Nesting of `with events:` and processing skipped while it was held
+        self._busy = 0
+        self._deferred = False
+        self.overflows = 0
+        self.coalesced = 0
+        # Bound methods created once, creating them in the ISR allocates
+        self.isr = self._isr
+        self._process_ref = self._process
+
+    def __len__(self):
+        return (self._head - self._tail) % self._size
+
+    def __enter__(self):
+        self._busy += 1
+        return self
+
+    def __exit__(self, *args):
+        self._busy -= 1
+        if self._busy == 0 and self._deferred and not self._scheduled:
+            self._deferred = False
+            if not self._schedule():
+                # Schedule queue full, retried at the end of the next block
+                self._deferred = True
+
+    def reset_counters(self):
+        self.overflows = 0
+        self.coalesced = 0
+
+    def _isr(self, pin):
+        ticks = utime.ticks_us()
+        head = self._head
+        next_head = head + 1
+        if next_head == self._size:
+            next_head = 0
+        if next_head == self._tail:
+            self.overflows += 1
+        else:
+            self._ticks[head] = ticks
+            self._levels[head] = pin.value()
+            self._head = next_head
+
+        if self._scheduled:
+            self.coalesced += 1
+        else:
+            # With the schedule queue full the next interrupt retries
+            self._schedule()
+
+    def _schedule(self):
+        self._scheduled = True
+        try:
+            schedule(self._process_ref, 0)
+        except RuntimeError:
+            self._scheduled = False
+            return False
+        return True
+
+    def _process(self, _):
+        self._scheduled = False
+        if self._busy:
+            # The main code is using the expander: run again when it leaves
+            self._deferred = True
+            return
+        # Only the events queued before the port read: the ones raised while the
+        # callbacks run are served by the next processing, with a new read
+        head = self._head
+        if head == self._tail:
+            return
+        # One port read for all the queued events
+        port = self._pcf.digital_read_all_byte()
+        callback = self._callback
+        while self._tail != head:
+            tail = self._tail
+            if callback is not None:
+                callback(self._ticks[tail], self._levels[tail], port)
+            tail += 1
+            self._tail = 0 if tail == self._size else tail
@@ -0,0 +1,91 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Pin groups for PCF8574/PCF8575 (imported by PCF8574.pin_group only when
+# used).
+#
+# A group of pins is read and written as one int with one port access.
+# Bit n of the value is the pin pins[n], so
+#     selector = pcf.pin_group((P4, P5, P6, P7))
+# maps P4 to bit 0 and P7 to bit 3. With gray=True the value is Gray coded
+# on the pins (rotary switches, absolute encoders).
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+
+class PinGroup:
+    def __init__(self, pcf, pins, gray=False):
+        pins = tuple(pins)
+        if not pins:
+            raise ValueError('At least one pin is needed')
+        for pin in pins:
+            if not 0 <= pin < pcf.PORT_WIDTH:
+                raise ValueError('Invalid pin')
+        if len(set(pins)) != len(pins):
+            raise ValueError('Duplicated pin')
+
+        self._pcf = pcf
+        self._pins = pins
+        self._gray = gray
+        self._value_mask = (1 << len(pins)) - 1
+        # Shift/mask tables: bit n of the value is the pin pins[n]
+        self._port_masks = tuple(1 << pin for pin in pins)
+        self._port_mask = 0
+        for mask in self._port_masks:
+            self._port_mask |= mask
+        # Contiguous ascending pins: the value is only a shift of the port
+        first = pins[0]
+        self._shift = first if pins == tuple(range(first, first + len(pins))) else -1
+
+    @property
+    def pins(self):
+        return self._pins
+
+    def from_port(self, port):
+        if self._shift >= 0:
+            value = (port >> self._shift) & self._value_mask
+        else:
+            value = 0
+            port_masks = self._port_masks
+            for i in range(len(port_masks)):
+                if port & port_masks[i]:
+                    value |= 1 << i
+        if self._gray:
+            value = _gray_decode(value)
+        return value
+
+    def to_port(self, value):
+        if self._gray:
+            value ^= value >> 1
+        if self._shift >= 0:
+            return value << self._shift
+        port = 0
+        port_masks = self._port_masks
+        for i in range(len(port_masks)):
+            if value & (1 << i):
+                port |= port_masks[i]
+        return port
+
+    def read(self):
+        return self.from_port(self._pcf.digital_read_all_byte())
+
+    def write(self, value):
+        if not 0 <= value <= self._value_mask:
+            raise ValueError('Value out of range for {} pins'.format(len(self._pins)))
+        pcf = self._pcf
+        pcf.write_byte_buffered = (pcf.write_byte_buffered & ~self._port_mask) | self.to_port(value)
+        pcf.write_buffer()
+
+
+def _gray_decode(value):
+    shift = value >> 1
+    while shift:
+        value ^= shift
+        shift >>= 1
+    return value
@@ -0,0 +1,159 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Linux i2c-dev bus backend for PCF8574 (Raspberry Pi and other SBC).
+#
+#   from PCF8574 import PCF8574
+#   from PCF8574_linux import LinuxI2CBus
+#
+#   pcf = PCF8574(0x20, i2c=LinuxI2CBus(1))
+#
+# Simple transfers select the slave with the I2C_SLAVE ioctl (only when the
+# address changes) and use write/readv on the file descriptor, combined
+# transfers (repeated start) use the I2C_RDWR ioctl. The ctypes message
+# structures and the write buffer are allocated once in the constructor,
+# the read message points to the caller buffer (bound once, the driver
+# always passes the same buffer).
+#
+# All the system calls go through the sys_calls object, so the backend can
+# be tested with a fake file descriptor.
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+import ctypes
+import fcntl
+import os
+
+from PCF8574_bus import I2CBus
+
+I2C_SLAVE = 0x0703
+I2C_SLAVE_FORCE = 0x0706
+I2C_RDWR = 0x0707
+
+I2C_M_RD = 0x0001
+
+
+class I2CMsg(ctypes.Structure):
+    _fields_ = [
+        ('addr', ctypes.c_uint16),
+        ('flags', ctypes.c_uint16),
+        ('len', ctypes.c_uint16),
+        ('buf', ctypes.c_void_p),
+    ]
+
+
+class I2CRdwrIoctlData(ctypes.Structure):
+    _fields_ = [
+        ('msgs', ctypes.POINTER(I2CMsg)),
+        ('nmsgs', ctypes.c_uint32),
+    ]
+
+
+class SysCalls:
+    def open(self, path):
+        return os.open(path, os.O_RDWR)
+
+    def close(self, fd):
+        os.close(fd)
+
+    def ioctl(self, fd, request, arg):
+        if isinstance(arg, int):
+            return fcntl.ioctl(fd, request, arg)
+        return fcntl.ioctl(fd, request, arg, True)
+
+    def write(self, fd, buf):
+        return os.write(fd, buf)
+
+    def readv(self, fd, buffers):
+        return os.readv(fd, buffers)
+
+
+class LinuxI2CBus(I2CBus):
+    def __init__(self, bus_id=1, fd=None, sys_calls=None, force=False, max_transfer=32):
+        self._sys = sys_calls if sys_calls is not None else SysCalls()
+        self._own_fd = fd is None
+        self._fd = self._sys.open('/dev/i2c-{}'.format(bus_id)) if fd is None else fd
+        self._slave_request = I2C_SLAVE_FORCE if force else I2C_SLAVE
+        self._slave_address = None
+        self._iov = [None]
+
+        # Combined transfer: a write message followed by a read message
+        self._max_transfer = max_transfer
+        self._out_data = bytearray(max_transfer)
+        self._probe_data = bytearray(1)
+        self._out_c = (ctypes.c_uint8 * max_transfer).from_buffer(self._out_data)
+        # in_buf of the last combined transfer and its ctypes view
+        self._in_buf = None
+        self._in_c = None
+
+        self._msgs = (I2CMsg * 2)()
+        # Indexing a ctypes array creates a new proxy object: the two views are kept
+        self._write_msg = self._msgs[0]
+        self._read_msg = self._msgs[1]
+        self._write_msg.flags = 0
+        self._write_msg.buf = ctypes.addressof(self._out_c)
+        self._read_msg.flags = I2C_M_RD
+        self._rdwr = I2CRdwrIoctlData(self._msgs, 2)
+
+    def close(self):
+        if self._fd is not None and self._own_fd:
+            self._sys.close(self._fd)
+        self._fd = None
+        # Release the bound read buffer
+        self._in_buf = None
+        self._in_c = None
+
+    def _select(self, address):
+        if address != self._slave_address:
+            self._sys.ioctl(self._fd, self._slave_request, address)
+            self._slave_address = address
+
+    def writeto(self, address, buf):
+        self._select(address)
+        written = self._sys.write(self._fd, buf)
+        if written != len(buf):
+            raise OSError(5, 'I2C short write to {:#x}'.format(address))
+        return written
+
+    def readfrom_into(self, address, buf):
+        self._select(address)
+        iov = self._iov
+        iov[0] = buf
+        read = self._sys.readv(self._fd, iov)
+        iov[0] = None
+        if read != len(buf):
+            raise OSError(5, 'I2C short read from {:#x}'.format(address))
+
+    def writeto_then_readfrom(self, address, out_buf, in_buf):
+        out_len = len(out_buf)
+        in_len = len(in_buf)
+        if out_len > self._max_transfer or in_len > self._max_transfer:
+            raise ValueError('Transfer longer than max_transfer ({})'.format(self._max_transfer))
+
+        # Same length slice assignment: copied in place
+        self._out_data[0:out_len] = out_buf
+        if in_buf is not self._in_buf:
+            # The kernel reads straight into in_buf (it can't be resized while bound)
+            self._in_c = (ctypes.c_uint8 * in_len).from_buffer(in_buf)
+            self._in_buf = in_buf
+            self._read_msg.buf = ctypes.addressof(self._in_c)
+        write_msg = self._write_msg
+        write_msg.addr = address
+        write_msg.len = out_len
+        read_msg = self._read_msg
+        read_msg.addr = address
+        read_msg.len = in_len
+        self._sys.ioctl(self._fd, I2C_RDWR, self._rdwr)
+
+    def probe(self, address):
+        try:
+            self.readfrom_into(address, self._probe_data)
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,52 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Native/viper compiled variants of the helpers of PCF8574.py that loop over
+# the pins of the port or the samples of a capture.
+#
+# This module is imported by PCF8574.py only if the port has the native
+# emitters enabled: if the import fails (CPython, port without emitter or
+# .mpy compiled for another architecture) the pure python versions defined
+# in PCF8574.py are used instead, so the two sets must stay identical.
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+import micropython
+
+
+@micropython.native
+def pack_bits(values, width):
+    result = 0
+    for i in range(width):
+        if values[i]:
+            result |= 1 << i
+    return result
+
+
+@micropython.native
+def unpack_bits(value, width, out):
+    for i in range(width):
+        out[i] = (value >> i) & 1
+    return out
+
+
+@micropython.viper
+def find_change(buf, start: int, end: int, wide: int, last: int) -> int:
+    # Index of the first sample in start..end-1 different from last, end if none
+    data = ptr8(buf)
+    i = start
+    while i < end:
+        if wide:
+            value = data[i << 1] | (data[(i << 1) + 1] << 8)
+        else:
+            value = data[i]
+        if value != last:
+            return i
+        i += 1
+    return end
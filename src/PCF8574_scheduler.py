@@ -0,0 +1,228 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Output pulse scheduler for PCF8574/PCF8575.
+#
+#   scheduler = pcf.pulse_scheduler()
+#   scheduler.pulse(P3, 250)           # P3 high for 250 ms
+#   scheduler.blink(P7, 500)           # P7 toggles every 500 ms
+#   scheduler.start()                  # machine.Timer, or
+#   asyncio.create_task(scheduler.run())
+#
+# Pending transitions of all the pins are kept in a small queue ordered by
+# deadline, in arrays allocated by the constructor. The transitions with
+# the same deadline are merged in write_byte_buffered and sent with one
+# port write, so many timed outputs cost one write per distinct deadline.
+#
+# With start() the service runs from micropython.schedule and can interrupt
+# the main code anywhere: the methods of the scheduler hold it off (the
+# service is skipped and scheduled again when they return), the other
+# reads and writes of the same expander must be done inside `with scheduler:`
+#
+#   with scheduler:
+#       pcf.digital_write(P0, 1)
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Renzo Mischianti www.mischianti.org All right reserved.
+#
+
+from array import array
+
+from PCF8574 import schedule, utime
+
+
+class PulseScheduler:
+    def __init__(self, pcf, size=16):
+        self._pcf = pcf
+        self._size = size
+        # Queue ordered by deadline (ticks_ms)
+        self._deadlines = array('I', [0] * size)
+        self._pins = bytearray(size)
+        self._values = bytearray(size)
+        # Periodic transitions: toggle period in ms (0 one shot) and remaining transitions (0 forever)
+        self._periods = array('I', [0] * size)
+        self._remaining = array('I', [0] * size)
+        self._queues = (self._deadlines, self._pins, self._values, self._periods, self._remaining)
+        self._count = 0
+        self._timer = None
+        # Nesting of `with scheduler:` and service skipped while it was held
+        self._busy = 0
+        self._deferred = False
+        # Bound once, so the timer callback doesn't allocate
+        self._service_ref = self._scheduled_service
+        self._timer_ref = self._timer_callback
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        self._busy += 1
+        return self
+
+    def __exit__(self, *args):
+        self._busy -= 1
+        if self._busy == 0 and self._deferred:
+            self._deferred = False
+            self._schedule()
+
+    def _insert(self, deadline, pin, value, period_ms, remaining):
+        if self._count == self._size:
+            raise ValueError('Scheduler queue full')
+        deadlines = self._deadlines
+        # Same deadline: after the transitions already queued
+        i = self._count
+        while i > 0 and utime.ticks_diff(deadline, deadlines[i - 1]) < 0:
+            i -= 1
+        self._move(i, i + 1, self._count - i)
+        deadlines[i] = deadline
+        self._pins[i] = pin
+        self._values[i] = value
+        self._periods[i] = period_ms
+        self._remaining[i] = remaining
+        self._count += 1
+
+    def _move(self, source, target, length):
+        if length <= 0:
+            return
+        for queue in self._queues:
+            if target > source:
+                for i in range(length - 1, -1, -1):
+                    queue[target + i] = queue[source + i]
+            else:
+                for i in range(length):
+                    queue[target + i] = queue[source + i]
+
+    def _remove(self, index):
+        self._move(index + 1, index, self._count - index - 1)
+        self._count -= 1
+
+    def at(self, pin, value, delay_ms):
+        if not 0 <= pin < self._pcf.PORT_WIDTH:
+            raise ValueError('Invalid pin')
+        with self:
+            self._insert(utime.ticks_add(utime.ticks_ms(), delay_ms), pin, 1 if value else 0, 0, 0)
+
+    def pulse(self, pin, duration_ms, value=1):
+        # A new pulse on the same pin replaces the pending one
+        if not 0 <= pin < self._pcf.PORT_WIDTH:
+            raise ValueError('Invalid pin')
+        value = 1 if value else 0
+        with self:
+            self.cancel(pin)
+            # The end of the pulse must fit in the queue before the output is driven
+            if self._count == self._size:
+                raise ValueError('Scheduler queue full')
+            self._pcf.digital_write(pin, value)
+            self.at(pin, 1 - value, duration_ms)
+
+    def blink(self, pin, period_ms, count=0, delay_ms=0):
+        # Toggle the pin every period_ms, count transitions (0 forever)
+        if period_ms <= 0:
+            raise ValueError('period_ms must be positive')
+        if not 0 <= pin < self._pcf.PORT_WIDTH:
+            raise ValueError('Invalid pin')
+        with self:
+            self.cancel(pin)
+            value = 1 - ((self._pcf.write_byte_buffered >> pin) & 1)
+            self._insert(utime.ticks_add(utime.ticks_ms(), delay_ms), pin, value, period_ms, count)
+
+    def cancel(self, pin=None):
+        # Remove the pending transitions of the pin (all of them without pin)
+        with self:
+            if pin is None:
+                self._count = 0
+                return
+            i = 0
+            while i < self._count:
+                if self._pins[i] == pin:
+                    self._remove(i)
+                else:
+                    i += 1
+
+    def next_deadline_ms(self):
+        # ms to the next transition, None with the queue empty
+        if self._count == 0:
+            return None
+        return max(0, utime.ticks_diff(self._deadlines[0], utime.ticks_ms()))
+
+    def service(self):
+        # Apply the due transitions, one port write for each distinct deadline
+        pcf = self._pcf
+        deadlines = self._deadlines
+        writes = 0
+        with self:
+            now = utime.ticks_ms()
+            while self._count and utime.ticks_diff(now, deadlines[0]) >= 0:
+                deadline = deadlines[0]
+                set_mask = 0
+                clear_mask = 0
+                while self._count and deadlines[0] == deadline:
+                    pin = self._pins[0]
+                    value = self._values[0]
+                    period = self._periods[0]
+                    remaining = self._remaining[0]
+                    self._remove(0)
+                    if value:
+                        set_mask |= 1 << pin
+                        clear_mask &= ~(1 << pin)
+                    else:
+                        clear_mask |= 1 << pin
+                        set_mask &= ~(1 << pin)
+                    if period and remaining != 1:
+                        # Drift free: the next deadline is computed from this one
+                        self._insert(utime.ticks_add(deadline, period), pin, 1 - value, period,
+                                     remaining - 1 if remaining else 0)
+                pcf.write_byte_buffered = (pcf.write_byte_buffered & ~clear_mask) | set_mask
+                pcf.write_buffer()
+                writes += 1
+        return writes
+
+    def _scheduled_service(self, _):
+        if self._busy:
+            # The main code is changing the queue or the outputs: run again when it leaves
+            self._deferred = True
+            return
+        self.service()
+
+    def _schedule(self):
+        try:
+            schedule(self._service_ref, 0)
+        except RuntimeError:
+            # Schedule queue full, served at the next tick
+            pass
+
+    def _timer_callback(self, timer):
+        # The timer callback can be a hard IRQ: no i2c here
+        self._schedule()
+
+    def start(self, timer_id=-1, period_ms=10):
+        from machine import Timer
+
+        self.stop()
+        self._timer = Timer(timer_id)
+        self._timer.init(mode=Timer.PERIODIC, period=period_ms, callback=self._timer_ref)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    async def run(self, interval_ms=10):
+        try:
+            import uasyncio as asyncio
+        except ImportError:
+            import asyncio
+
+        sleep_ms = getattr(asyncio, 'sleep_ms', None)
+        while True:
+            self.service()
+            wait = self.next_deadline_ms()
+            wait = interval_ms if wait is None else min(wait, interval_ms)
+            if sleep_ms is not None:
+                await sleep_ms(wait)
+            else:
+                await asyncio.sleep(wait / 1000)
@@ -0,0 +1,40 @@
+from PCF8574_bus import I2CBus
+
+
+class FakeBus(I2CBus):
+    # RAM only expander: records the values written, reads return port
+    # (samples, when set, gives the values of readfrom_into one by one)
+    def __init__(self, port=0xFF, width=8):
+        self.port = port
+        self.nbytes = width >> 3
+        self.writes = []
+        self.operations = 0
+        # Number of the next operations that fail with OSError
+        self.fail = 0
+        self.samples = None
+
+    def _operation(self):
+        self.operations += 1
+        if self.fail:
+            self.fail -= 1
+            raise OSError(5, 'Input/output error')
+
+    def writeto(self, address, buf):
+        self._operation()
+        self.writes.append(int.from_bytes(buf, 'little'))
+        return len(buf)
+
+    def readfrom_into(self, address, buf):
+        self._operation()
+        nbytes = self.nbytes
+        for i in range(0, len(buf), nbytes):
+            value = next(self.samples) if self.samples is not None else self.port
+            buf[i:i + nbytes] = value.to_bytes(nbytes, 'little')
+
+    def writeto_then_readfrom(self, address, out_buf, in_buf):
+        self._operation()
+        self.writes.append(int.from_bytes(out_buf, 'little'))
+        in_buf[:] = self.port.to_bytes(len(in_buf), 'little')
+
+    def probe(self, address):
+        return True
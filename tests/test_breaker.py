@@ -0,0 +1,154 @@
+import pytest
+
+import PCF8574_breaker
+from PCF8574 import PCF8574, Pin, P0, P1, P7
+from fakes import FakeBus
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # ticks_ms under test control, sleep_us recorded
+    clock = {'ms': 0, 'sleeps': []}
+    monkeypatch.setattr(PCF8574_breaker.utime, 'ticks_ms', lambda: clock['ms'])
+    monkeypatch.setattr(PCF8574_breaker.utime, 'sleep_us', lambda us: clock['sleeps'].append(us))
+    return clock
+
+
+def make_pcf(port=0x01, **policy):
+    bus = FakeBus(port=port)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    pcf.Pin(P1, Pin.IN, Pin.PULL_UP)
+    pcf.Pin(P7, Pin.OUT)
+    pcf.begin()
+    pcf.set_error_policy(**policy)
+    return pcf, bus
+
+
+def test_retries_then_success(clock):
+    pcf, bus = make_pcf(retries=2, backoff_us=100)
+    operations = bus.operations
+    bus.fail = 2
+
+    assert pcf.digital_read(P0, True) == 1
+
+    assert bus.operations == operations + 3
+    status = pcf.status()
+    assert status['retried'] == 2
+    assert status['errors'] == 0
+    assert status['consecutive_failures'] == 0
+    assert status['available']
+
+
+def test_exponential_backoff(clock):
+    pcf, bus = make_pcf(retries=2, backoff_us=200, failure_threshold=10)
+    bus.fail = 3
+
+    pcf.digital_read(P0, True)
+
+    assert clock['sleeps'] == [200, 400]
+    assert pcf.status()['errors'] == 1
+    assert pcf.status()['last_error'] == 5
+
+
+def test_no_backoff_sleep_without_backoff_us(clock):
+    pcf, bus = make_pcf(retries=2, backoff_us=0)
+    bus.fail = 2
+    pcf.digital_read(P0, True)
+    assert clock['sleeps'] == []
+
+
+def test_trip_at_failure_threshold(clock):
+    pcf, bus = make_pcf(retries=0, failure_threshold=3, cooldown_ms=1000)
+    bus.fail = 100
+
+    for _ in range(2):
+        pcf.digital_write(P7, 1)
+        assert pcf.is_available()
+    pcf.digital_write(P7, 1)
+
+    assert not pcf.is_available()
+    status = pcf.status()
+    assert status['open']
+    assert status['consecutive_failures'] == 3
+    assert status['retry_in_ms'] == 1000
+
+
+def test_open_breaker_skips_the_bus_and_serves_the_cached_value(clock):
+    pcf, bus = make_pcf(port=0x01, retries=0, failure_threshold=1)
+    assert pcf.digital_read_all_byte() & 0x01
+
+    bus.fail = 1
+    pcf.digital_read_all_byte()
+    assert pcf.status()['open']
+
+    operations = bus.operations
+    bus.port = 0x00
+    assert pcf.digital_read_all_byte() & 0x01
+    pcf.digital_write(P7, 1)
+    assert bus.operations == operations
+    assert pcf.status()['skipped'] == 2
+
+
+def test_half_open_single_attempt_and_retrip(clock):
+    pcf, bus = make_pcf(retries=2, failure_threshold=1, cooldown_ms=500)
+    bus.fail = 100
+    pcf.digital_read(P0, True)
+    assert pcf.status()['open']
+
+    clock['ms'] = 500
+    status = pcf.status()
+    # Cool-down over, but the device is not back until the attempt succeeds
+    assert not status['open']
+    assert not status['available']
+    assert not pcf.is_available()
+
+    operations = bus.operations
+    pcf.digital_read(P0, True)
+    assert bus.operations == operations + 1
+    assert pcf.status()['open']
+    assert pcf.status()['retry_in_ms'] == 500
+
+
+def test_half_open_success_closes(clock):
+    pcf, bus = make_pcf(retries=2, failure_threshold=1, cooldown_ms=500)
+    bus.fail = 3
+    pcf.digital_read(P0, True)
+    assert pcf.status()['open']
+
+    clock['ms'] = 600
+    pcf.digital_read(P0, True)
+
+    assert pcf.is_available()
+    assert pcf.status()['available']
+    assert pcf.status()['consecutive_failures'] == 0
+
+
+def test_pending_write_flushed_when_the_device_is_back(clock):
+    pcf, bus = make_pcf(port=0x00, retries=0, failure_threshold=1, cooldown_ms=500)
+    bus.fail = 1
+    pcf.digital_write(P7, 1)
+    assert pcf.status()['open']
+    # Buffered while the device is skipped
+    pcf.digital_write(P7, 0)
+    pcf.digital_write(P7, 1)
+
+    clock['ms'] = 500
+    writes = len(bus.writes)
+    pcf.digital_read(P0, True)
+
+    # The read, then the buffered outputs
+    assert len(bus.writes) == writes + 2
+    assert bus.writes[-1] & (1 << P7)
+    assert not pcf._breaker.pending_write
+
+
+def test_dead_from_boot_reads_inputs_at_rest(clock):
+    pcf, bus = make_pcf(port=0xFF, retries=0, failure_threshold=1)
+    bus.fail = 100
+
+    # Pull-down input not pressed, pull-up input not pressed
+    assert pcf.digital_read(P0, True) == 0
+    assert pcf.digital_read(P1, True) == 1
+    assert pcf.digital_read_all_byte() & ((1 << P0) | (1 << P1)) == 1 << P1
+    assert pcf.status()['open']
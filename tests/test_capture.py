@@ -0,0 +1,131 @@
+import io
+import itertools
+
+import pytest
+
+import PCF8574_capture
+from PCF8574 import PCF8574, Pin, P0, P1, P7
+from PCF8574_capture import Capture
+from fakes import FakeBus
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # ticks_us advances 80 us per call (10 us per sample of a burst of 8), ticks_ms 1 ms per call
+    us = itertools.count(0, 80)
+    ms = itertools.count()
+    monkeypatch.setattr(PCF8574_capture.utime, 'ticks_us', lambda: next(us))
+    monkeypatch.setattr(PCF8574_capture.utime, 'ticks_ms', lambda: next(ms))
+
+
+def sampled_bus(samples, width=8, repeat=None):
+    bus = FakeBus(width=width)
+    tail = itertools.repeat(samples[-1]) if repeat is None else itertools.cycle(repeat)
+    bus.samples = itertools.chain(samples, tail)
+    return bus
+
+
+def test_immediate_start_stores_only_changes():
+    bus = sampled_bus([1, 1, 3, 3, 3, 7, 0, 0])
+    capture = Capture(8, size=4).run(bus, 0x20)
+
+    assert capture.triggered
+    assert capture.trigger_index == 0
+    assert capture.count == 4
+    assert list(capture.values[:4]) == [1, 3, 7, 0]
+    # Samples at 90, 110, 140 and 150 us
+    assert list(capture.deltas[:4]) == [0, 20, 30, 10]
+    assert list(capture.changes()) == [(0, 1), (20, 3), (50, 7), (60, 0)]
+
+
+def test_edge_trigger_with_pretrigger_rotation():
+    # P0 changes only at 0x07: the 3 changes before it are kept, oldest first
+    bus = sampled_bus([0x00, 0x02, 0x04, 0x06, 0x07, 0x06], repeat=[0x07, 0x06])
+    capture = Capture(8, size=5).run(bus, 0x20, trigger_mask=1 << P0, pretrigger=3)
+
+    assert capture.triggered
+    assert capture.trigger_index == 3
+    assert list(capture.values[:capture.count]) == [0x02, 0x04, 0x06, 0x07, 0x06]
+
+
+def test_level_trigger():
+    bus = sampled_bus([0, 1, 2, 3, 1])
+    capture = Capture(8, size=2).run(bus, 0x20, trigger_mask=0x03, trigger_value=0x03)
+
+    assert capture.triggered
+    assert capture.trigger_index == 0
+    assert list(capture.values[:capture.count]) == [3, 1]
+
+
+def test_timeout_keeps_the_pretrigger_changes():
+    bus = sampled_bus([0, 1], repeat=[0, 1])
+    capture = Capture(8, size=16).run(bus, 0x20, trigger_mask=1 << P7, pretrigger=2, timeout_ms=5)
+
+    assert not capture.triggered
+    assert capture.trigger_index == -1
+    assert list(capture.values[:capture.count]) == [0, 1]
+
+
+def test_duration_ends_the_capture():
+    bus = sampled_bus([0, 1], repeat=[0, 1])
+    capture = Capture(8, size=256).run(bus, 0x20, duration_ms=3)
+
+    assert capture.triggered
+    assert 0 < capture.count < 256
+
+
+def test_pretrigger_must_be_lower_than_size():
+    with pytest.raises(ValueError):
+        Capture(8, size=4).run(FakeBus(), 0x20, pretrigger=4)
+
+
+def test_16_bit_samples():
+    bus = sampled_bus([0x0100, 0x0100, 0x8001], width=16)
+    capture = Capture(16, size=2).run(bus, 0x20)
+
+    assert list(capture.values[:capture.count]) == [0x0100, 0x8001]
+
+
+def test_driver_releases_inputs_before_sampling():
+    bus = FakeBus(port=0x83)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    pcf.Pin(P1, Pin.IN, Pin.PULL_UP)
+    pcf.Pin(P7, Pin.OUT, 1)
+    pcf.begin()
+    # begin() writes the pull-down input P0 low
+    assert bus.writes[-1] == 0x82
+
+    capture = pcf.capture(size=4, duration_ms=2)
+
+    assert bus.writes[-1] == 0x83
+    assert capture.values[0] == 0x83
+
+
+def test_write_vcd():
+    capture = Capture(8, size=4)
+    capture.count = 3
+    for i, (delta, value) in enumerate(((0, 0x01), (5, 0x03), (7, 0x02))):
+        capture.deltas[i] = delta
+        capture.values[i] = value
+    stream = io.StringIO()
+
+    capture.write_vcd(stream)
+
+    codes = ['!', '"', '#', '$', '%', '&', "'", '(']
+    expected = ['$version PCF8574 micropython library $end', '$timescale 1us $end', '$scope module pcf8574 $end']
+    expected += ['$var wire 1 {} P{} $end'.format(codes[pin], pin) for pin in range(8)]
+    expected += ['$upscope $end', '$enddefinitions $end', '#0', '$dumpvars', '1!']
+    expected += ['0' + code for code in codes[1:]]
+    expected += ['$end', '#5', '1"', '#12', '0!', '']
+    assert stream.getvalue() == '\n'.join(expected)
+
+
+def test_write_vcd_pcf8575_names():
+    capture = Capture(16, size=1)
+    stream = io.StringIO()
+    capture.write_vcd(stream, module='pcf8575')
+    text = stream.getvalue()
+    assert '$scope module pcf8575 $end' in text
+    assert '$var wire 1 ) P10 $end' in text
+    assert '$var wire 1 0 P17 $end' in text
@@ -0,0 +1,77 @@
+import pytest
+
+from PCF8574 import PCF8574, PCF8575, DigitalInput, Pin, P0, P1, P7, P10, P17
+from fakes import FakeBus
+
+
+def test_digital_input_int_round_trip():
+    for width, value in ((8, 0xA5), (16, 0x81C3)):
+        digital_input = DigitalInput(width)
+        digital_input.from_int(value)
+        assert digital_input.to_int() == value
+        assert len(digital_input) == width
+
+
+def test_digital_input_pcf8575_names():
+    digital_input = DigitalInput(16)
+    digital_input.from_int(0x8100)
+    assert (digital_input.p10, digital_input.p17, digital_input.p0) == (1, 1, 0)
+    assert not hasattr(digital_input, 'p8')
+
+
+def test_digital_read_all_pcf8575():
+    bus = FakeBus(port=0x0100, width=16)
+    pcf = PCF8575(0x20, i2c=bus)
+    pcf.Pin(P10, Pin.IN)
+    pcf.Pin(P17, Pin.OUT)
+    pcf.begin()
+    digital_input = pcf.digital_read_all()
+    assert digital_input.p10 == 1
+    assert digital_input.p17 == 0
+
+
+def test_write_all_array_shorter_than_port():
+    bus = FakeBus(width=16)
+    pcf = PCF8575(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.OUT)
+    pcf.Pin(P17, Pin.OUT, 1)
+    pcf.begin()
+
+    pcf.digital_write_all_array([1, 0, 0, 0, 0, 0, 0, 0])
+
+    assert bus.writes[-1] == (1 << P0) | (1 << P17)
+
+
+def test_write_all_array_longer_than_port():
+    pcf = PCF8574(0x20, i2c=FakeBus())
+    with pytest.raises(ValueError):
+        pcf.digital_write_all_array([0] * 16)
+
+
+def test_write_all_with_8_pin_input_on_pcf8575():
+    bus = FakeBus(width=16)
+    pcf = PCF8575(0x20, i2c=bus)
+    pcf.Pin(P1, Pin.OUT)
+    pcf.Pin(P17, Pin.OUT, 1)
+    pcf.begin()
+
+    digital_input = DigitalInput(8)
+    digital_input.p1 = 1
+    pcf.digital_write_all(digital_input)
+
+    assert bus.writes[-1] == (1 << P1) | (1 << P17)
+
+
+def test_write_all_with_16_pin_input_on_pcf8574():
+    pcf = PCF8574(0x20, i2c=FakeBus())
+    with pytest.raises(ValueError):
+        pcf.digital_write_all(DigitalInput(16))
+
+
+def test_read_all_array_keeps_outputs():
+    bus = FakeBus(port=0x01)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    pcf.Pin(P7, Pin.OUT, 1)
+    pcf.begin()
+    assert pcf.digital_read_all_array() == [1, 0, 0, 0, 0, 0, 0, 1]
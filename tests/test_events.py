@@ -0,0 +1,135 @@
+import pytest
+
+import PCF8574_events
+from PCF8574 import PCF8574, Pin, P0
+from PCF8574_events import InterruptEvents
+from fakes import FakeBus
+
+
+class FakeIrqPin:
+    def __init__(self, level=0):
+        self.level = level
+
+    def value(self):
+        return self.level
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    # micropython.schedule stand-in: the callbacks run only when the test says so
+    pending = []
+    monkeypatch.setattr(PCF8574_events, 'schedule', lambda function, arg: pending.append((function, arg)))
+    ticks = [0]
+
+    def ticks_us():
+        ticks[0] += 10
+        return ticks[0]
+
+    monkeypatch.setattr(PCF8574_events.utime, 'ticks_us', ticks_us)
+    return pending
+
+
+def run_scheduled(pending):
+    while pending:
+        function, arg = pending.pop(0)
+        function(arg)
+
+
+def make_events(size, callback=None):
+    bus = FakeBus(port=0x01)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    pcf.begin()
+    received = []
+    if callback is None:
+        def callback(ticks, level, port):
+            received.append((ticks, level, port))
+    return InterruptEvents(pcf, callback, size), bus, received
+
+
+def test_events_delivered_in_order_across_wrap(scheduled):
+    events, _, received = make_events(3)
+    pin = FakeIrqPin()
+    for _ in range(2):
+        events.isr(pin)
+    run_scheduled(scheduled)
+    for level in (1, 0, 1):
+        pin.level = level
+        events.isr(pin)
+    run_scheduled(scheduled)
+
+    assert [ticks for ticks, _, _ in received] == [10, 20, 30, 40, 50]
+    assert [level for _, level, _ in received] == [0, 0, 1, 0, 1]
+    assert len(events) == 0
+    assert events.overflows == 0
+
+
+def test_overflow_and_coalesced(scheduled):
+    events, bus, received = make_events(2)
+    pin = FakeIrqPin()
+    for _ in range(4):
+        events.isr(pin)
+
+    assert len(events) == 2
+    assert events.overflows == 2
+    # One processing scheduled, the other three interrupts wait for it
+    assert len(scheduled) == 1
+    assert events.coalesced == 3
+
+    operations = bus.operations
+    run_scheduled(scheduled)
+    assert [ticks for ticks, _, _ in received] == [10, 20]
+    # One port read for all the queued events
+    assert bus.operations == operations + 1
+
+    events.reset_counters()
+    assert (events.overflows, events.coalesced) == (0, 0)
+
+
+def test_events_raised_during_callbacks_get_a_new_read(scheduled):
+    pin = FakeIrqPin()
+    received = []
+    state = {}
+
+    def callback(ticks, level, port):
+        received.append((ticks, port))
+        if len(received) == 1:
+            # Edge while the callbacks run: the port has changed
+            state['bus'].port = 0x00
+            state['events'].isr(pin)
+
+    events, bus, _ = make_events(4, callback)
+    state['bus'] = bus
+    state['events'] = events
+    events.isr(pin)
+    run_scheduled(scheduled)
+
+    assert received == [(10, 1), (20, 0)]
+
+
+def test_processing_waits_for_the_main_code(scheduled):
+    events, bus, received = make_events(4)
+    pin = FakeIrqPin()
+    with events:
+        with events:
+            events.isr(pin)
+            operations = bus.operations
+            run_scheduled(scheduled)
+            assert received == []
+            assert bus.operations == operations
+        # Still held by the outer block
+        assert scheduled == []
+    assert len(scheduled) == 1
+    run_scheduled(scheduled)
+    assert [ticks for ticks, _, _ in received] == [10]
+
+
+def test_exception_in_block_releases_the_hold(scheduled):
+    events, _, received = make_events(4)
+    with pytest.raises(RuntimeError):
+        with events:
+            events.isr(FakeIrqPin())
+            run_scheduled(scheduled)
+            raise RuntimeError('main code error')
+    run_scheduled(scheduled)
+    assert len(received) == 1
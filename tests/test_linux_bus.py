@@ -0,0 +1,188 @@
+import ctypes
+import errno
+
+import pytest
+
+from PCF8574 import PCF8574, Pin, P0, P7
+from PCF8574_linux import LinuxI2CBus, I2C_M_RD, I2C_RDWR, I2C_SLAVE, I2C_SLAVE_FORCE
+
+
+class FakeSysCalls:
+    # Fake /dev/i2c-N file descriptor: records the calls, the device answers with port
+    def __init__(self, port=0xA5):
+        self.port = port
+        self.calls = []
+        self.messages = []
+        self.short = False
+        self.nack = False
+
+    def open(self, path):
+        self.calls.append(('open', path))
+        return 42
+
+    def close(self, fd):
+        self.calls.append(('close', fd))
+
+    def ioctl(self, fd, request, arg):
+        if request in (I2C_SLAVE, I2C_SLAVE_FORCE):
+            self.calls.append(('slave', request, arg))
+            return 0
+        assert request == I2C_RDWR
+        if self.nack:
+            raise OSError(errno.EREMOTEIO, 'Remote I/O error')
+        self.calls.append(('rdwr', arg.nmsgs))
+        for i in range(arg.nmsgs):
+            msg = arg.msgs[i]
+            data = (ctypes.c_uint8 * msg.len).from_address(msg.buf)
+            self.messages.append((msg.addr, msg.flags, msg.len, bytes(data)))
+            if msg.flags & I2C_M_RD:
+                for j in range(msg.len):
+                    data[j] = self.port
+        return arg.nmsgs
+
+    def write(self, fd, buf):
+        if self.nack:
+            raise OSError(errno.EREMOTEIO, 'Remote I/O error')
+        self.calls.append(('write', bytes(buf)))
+        return len(buf) - 1 if self.short else len(buf)
+
+    def readv(self, fd, buffers):
+        if self.nack:
+            raise OSError(errno.EREMOTEIO, 'Remote I/O error')
+        buf = buffers[0]
+        size = len(buf) - 1 if self.short else len(buf)
+        for i in range(size):
+            buf[i] = self.port
+        self.calls.append(('readv', len(buf)))
+        return size
+
+
+def slave_calls(sys_calls):
+    return [call for call in sys_calls.calls if call[0] == 'slave']
+
+
+def test_open_and_close_device():
+    sys_calls = FakeSysCalls()
+    bus = LinuxI2CBus(3, sys_calls=sys_calls)
+    bus.close()
+    assert sys_calls.calls == [('open', '/dev/i2c-3'), ('close', 42)]
+
+
+def test_given_fd_is_not_closed():
+    sys_calls = FakeSysCalls()
+    bus = LinuxI2CBus(fd=7, sys_calls=sys_calls)
+    bus.close()
+    assert sys_calls.calls == []
+
+
+def test_slave_address_is_selected_only_when_it_changes():
+    sys_calls = FakeSysCalls()
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    buf = bytearray(1)
+
+    bus.writeto(0x20, b'\x01')
+    bus.readfrom_into(0x20, buf)
+    bus.writeto(0x21, b'\x02')
+    bus.writeto(0x21, b'\x03')
+    bus.writeto(0x20, b'\x04')
+
+    assert slave_calls(sys_calls) == [('slave', I2C_SLAVE, 0x20), ('slave', I2C_SLAVE, 0x21),
+                                      ('slave', I2C_SLAVE, 0x20)]
+    assert buf == bytearray([0xA5])
+
+
+def test_force_uses_slave_force():
+    sys_calls = FakeSysCalls()
+    bus = LinuxI2CBus(1, sys_calls=sys_calls, force=True)
+    bus.writeto(0x20, b'\x01')
+    assert slave_calls(sys_calls) == [('slave', I2C_SLAVE_FORCE, 0x20)]
+
+
+def test_short_write_raises():
+    sys_calls = FakeSysCalls()
+    sys_calls.short = True
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    with pytest.raises(OSError):
+        bus.writeto(0x20, b'\x01\x02')
+
+
+def test_short_read_raises():
+    sys_calls = FakeSysCalls()
+    sys_calls.short = True
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    with pytest.raises(OSError):
+        bus.readfrom_into(0x20, bytearray(2))
+
+
+def test_combined_transfer_message_layout():
+    sys_calls = FakeSysCalls(port=0x5A)
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    in_buf = bytearray(2)
+
+    bus.writeto_then_readfrom(0x27, b'\xff\x0f', in_buf)
+
+    assert sys_calls.calls[-1] == ('rdwr', 2)
+    assert sys_calls.messages == [(0x27, 0, 2, b'\xff\x0f'), (0x27, I2C_M_RD, 2, b'\x00\x00')]
+    assert in_buf == bytearray([0x5A, 0x5A])
+
+
+def test_combined_transfer_same_buffer():
+    sys_calls = FakeSysCalls(port=0x3C)
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    buf = bytearray([0x81])
+
+    bus.writeto_then_readfrom(0x20, buf, buf)
+
+    assert sys_calls.messages[0] == (0x20, 0, 1, b'\x81')
+    assert buf == bytearray([0x3C])
+
+
+def test_combined_transfer_too_long():
+    bus = LinuxI2CBus(1, sys_calls=FakeSysCalls(), max_transfer=2)
+    with pytest.raises(ValueError):
+        bus.writeto_then_readfrom(0x20, b'\x00\x00\x00', bytearray(1))
+
+
+def test_probe():
+    sys_calls = FakeSysCalls()
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    assert bus.probe(0x20)
+    sys_calls.nack = True
+    assert not bus.probe(0x21)
+
+
+def test_combined_transfer_rebinds_a_new_in_buf():
+    sys_calls = FakeSysCalls(port=0x11)
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    first = bytearray(1)
+    second = bytearray(2)
+
+    bus.writeto_then_readfrom(0x20, b'\x00', first)
+    bus.writeto_then_readfrom(0x20, b'\x00', second)
+
+    assert first == bytearray([0x11])
+    assert second == bytearray([0x11, 0x11])
+
+
+def test_driver_port_read_is_one_combined_transfer():
+    sys_calls = FakeSysCalls(port=0x0F)
+    bus = LinuxI2CBus(1, sys_calls=sys_calls)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    pcf.Pin(P7, Pin.OUT)
+    assert pcf.begin()
+
+    del sys_calls.calls[:]
+    del sys_calls.messages[:]
+    assert pcf.digital_read(P0, True) == 1
+
+    assert sys_calls.calls == [('rdwr', 2)]
+    assert sys_calls.messages[0][:3] == (0x20, 0, 1)
+    assert sys_calls.messages[1][:3] == (0x20, I2C_M_RD, 1)
+
+
+def test_attach_interrupt_without_machine_pin():
+    pcf = PCF8574(0x20, i2c=LinuxI2CBus(1, sys_calls=FakeSysCalls()))
+    with pytest.raises(NotImplementedError):
+        pcf.attach_interrupt(18, lambda pin: None)
+    assert pcf.begin()
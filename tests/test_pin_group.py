@@ -0,0 +1,116 @@
+import pytest
+
+from PCF8574 import PCF8574, PCF8575, Pin, P0, P1, P2, P3, P4, P5, P6, P7, P10, P17
+from PCF8574_group import PinGroup
+from fakes import FakeBus
+
+
+def output_pcf(pcf_class=PCF8574, width=8):
+    bus = FakeBus(width=width)
+    pcf = pcf_class(0x20, i2c=bus)
+    for pin in range(pcf.PORT_WIDTH):
+        pcf.Pin(pin, Pin.OUT)
+    pcf.begin()
+    return pcf, bus
+
+
+def test_pin_mapping():
+    pcf, _ = output_pcf()
+    group = pcf.pin_group((P4, P5, P6, P7))
+    assert group.pins == (P4, P5, P6, P7)
+    assert group.to_port(0b0001) == 1 << P4
+    assert group.to_port(0b1000) == 1 << P7
+    assert group.from_port(1 << P5) == 0b0010
+
+
+def test_contiguous_pins_use_shift():
+    pcf, _ = output_pcf()
+    group = pcf.pin_group((P2, P3, P4))
+    assert group._shift == P2
+    for value in range(8):
+        assert group.to_port(value) == value << P2
+        assert group.from_port((value << P2) | 0b11) == value
+
+
+def test_scattered_pins_use_masks():
+    pcf, _ = output_pcf()
+    group = pcf.pin_group((P7, P0, P3))
+    assert group._shift == -1
+    assert group.to_port(0b001) == 1 << P7
+    assert group.to_port(0b010) == 1 << P0
+    assert group.to_port(0b100) == 1 << P3
+    for value in range(8):
+        assert group.from_port(group.to_port(value)) == value
+
+
+def test_mask_path_matches_shift_path():
+    pcf, _ = output_pcf()
+    contiguous = pcf.pin_group((P1, P2, P3))
+    # Same pins, not ascending: mapping through the masks
+    reversed_group = pcf.pin_group((P3, P2, P1))
+    for port in range(256):
+        value = contiguous.from_port(port)
+        reversed_value = reversed_group.from_port(port)
+        assert reversed_value == int('{:03b}'.format(value)[::-1], 2)
+
+
+def test_gray_round_trip():
+    pcf, _ = output_pcf()
+    group = pcf.pin_group((P0, P1, P2, P3), gray=True)
+    ports = set()
+    previous = None
+    for value in range(16):
+        port = group.to_port(value)
+        assert group.from_port(port) == value
+        if previous is not None:
+            # One pin changes between consecutive values
+            assert bin(port ^ previous).count('1') == 1
+        previous = port
+        ports.add(port)
+    assert len(ports) == 16
+
+
+def test_write_keeps_other_outputs():
+    pcf, bus = output_pcf()
+    pcf.digital_write(P0, 1)
+    group = pcf.pin_group((P4, P5, P6))
+    group.write(0b101)
+    assert bus.writes[-1] == (1 << P0) | (1 << P4) | (1 << P6)
+    group.write(0)
+    assert bus.writes[-1] == 1 << P0
+
+
+def test_write_range():
+    pcf, _ = output_pcf()
+    group = pcf.pin_group((P0, P1))
+    with pytest.raises(ValueError):
+        group.write(4)
+    with pytest.raises(ValueError):
+        group.write(-1)
+    group.write(3)
+
+
+def test_read():
+    bus = FakeBus(port=0b10100000)
+    pcf = PCF8574(0x20, i2c=bus)
+    for pin in (P5, P6, P7):
+        pcf.Pin(pin, Pin.IN)
+    pcf.begin()
+    assert pcf.pin_group((P5, P6, P7)).read() == 0b101
+
+
+def test_pcf8575_pins():
+    pcf, bus = output_pcf(PCF8575, 16)
+    group = pcf.pin_group((P10, P17))
+    group.write(0b11)
+    assert bus.writes[-1] == (1 << P10) | (1 << P17)
+
+
+def test_invalid_groups():
+    pcf, _ = output_pcf()
+    with pytest.raises(ValueError):
+        PinGroup(pcf, ())
+    with pytest.raises(ValueError):
+        pcf.pin_group((P0, P0))
+    with pytest.raises(ValueError):
+        pcf.pin_group((P0, 8))
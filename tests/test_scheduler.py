@@ -0,0 +1,223 @@
+import pytest
+
+import PCF8574_scheduler
+from PCF8574 import PCF8574, Pin, P0, P1, P2, P3, P4, P7
+from fakes import FakeBus
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {'ms': 0}
+    monkeypatch.setattr(PCF8574_scheduler.utime, 'ticks_ms', lambda: clock['ms'])
+    return clock
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    # micropython.schedule stand-in: the callbacks run only when the test says so
+    pending = []
+    monkeypatch.setattr(PCF8574_scheduler, 'schedule', lambda function, arg: pending.append((function, arg)))
+    return pending
+
+
+def make_scheduler(size=16):
+    bus = FakeBus(port=0x00)
+    pcf = PCF8574(0x20, i2c=bus)
+    pcf.Pin(P0, Pin.IN)
+    for pin in (P1, P2, P3, P4, P7):
+        pcf.Pin(pin, Pin.OUT)
+    pcf.begin()
+    return pcf.pulse_scheduler(size), pcf, bus
+
+
+def queue(scheduler):
+    return [(scheduler._deadlines[i], scheduler._pins[i], scheduler._values[i]) for i in range(len(scheduler))]
+
+
+def test_queue_ordered_by_deadline(clock):
+    scheduler, _, _ = make_scheduler()
+    scheduler.at(P1, 1, 30)
+    scheduler.at(P2, 1, 10)
+    scheduler.at(P3, 1, 20)
+    # Same deadline: after the transitions already queued
+    scheduler.at(P4, 0, 20)
+
+    assert queue(scheduler) == [(10, P2, 1), (20, P3, 1), (20, P4, 0), (30, P1, 1)]
+    assert scheduler.next_deadline_ms() == 10
+
+
+def test_only_due_transitions_applied(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.at(P1, 1, 10)
+    scheduler.at(P2, 1, 20)
+
+    clock['ms'] = 15
+    assert scheduler.service() == 1
+    assert bus.writes[-1] == 1 << P1
+    assert len(scheduler) == 1
+    assert scheduler.next_deadline_ms() == 5
+
+
+def test_one_write_per_deadline(clock):
+    scheduler, pcf, bus = make_scheduler()
+    for pin in (P1, P2, P3):
+        scheduler.at(pin, 1, 10)
+    scheduler.at(P4, 1, 20)
+
+    writes = len(bus.writes)
+    clock['ms'] = 20
+    assert scheduler.service() == 2
+    assert bus.writes[writes:] == [(1 << P1) | (1 << P2) | (1 << P3), (1 << P1) | (1 << P2) | (1 << P3) | (1 << P4)]
+    assert scheduler.next_deadline_ms() is None
+
+
+def test_last_transition_of_a_pin_wins_in_a_deadline(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.at(P1, 1, 10)
+    scheduler.at(P1, 0, 10)
+    clock['ms'] = 10
+    scheduler.service()
+    assert not pcf.write_byte_buffered & (1 << P1)
+
+
+def test_pulse(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.pulse(P3, 250)
+    assert bus.writes[-1] == 1 << P3
+
+    clock['ms'] = 249
+    assert scheduler.service() == 0
+    clock['ms'] = 250
+    assert scheduler.service() == 1
+    assert bus.writes[-1] == 0
+
+
+def test_read_during_pulse_keeps_the_output(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.pulse(P3, 250)
+    pcf.digital_read(P0, True)
+    pcf.digital_read_all_byte()
+    # The reads write the inputs high and the outputs unchanged
+    assert bus.writes[-2:] == [(1 << P3) | (1 << P0)] * 2
+
+
+def test_new_pulse_replaces_the_pending_one(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.pulse(P3, 100)
+    clock['ms'] = 50
+    scheduler.pulse(P3, 100)
+    assert queue(scheduler) == [(150, P3, 0)]
+
+
+def test_blink_count_and_drift(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.blink(P7, 100, count=3)
+
+    levels = []
+    for ms in (0, 130, 200, 300, 400):
+        clock['ms'] = ms
+        if scheduler.service():
+            levels.append((ms, (bus.writes[-1] >> P7) & 1))
+
+    # Deadlines 0, 100 (served late at 130) and 200: the period doesn't drift
+    assert levels == [(0, 1), (130, 0), (200, 1)]
+    assert len(scheduler) == 0
+
+
+def test_blink_forever(clock):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.blink(P7, 10)
+    for ms in range(0, 1000, 10):
+        clock['ms'] = ms
+        scheduler.service()
+    assert len(scheduler) == 1
+
+
+def test_cancel(clock):
+    scheduler, _, _ = make_scheduler()
+    scheduler.at(P1, 1, 10)
+    scheduler.at(P2, 1, 20)
+    scheduler.at(P1, 0, 30)
+
+    scheduler.cancel(P1)
+    assert queue(scheduler) == [(20, P2, 1)]
+    scheduler.cancel()
+    assert len(scheduler) == 0
+
+
+def test_queue_full(clock):
+    scheduler, pcf, bus = make_scheduler(size=2)
+    scheduler.at(P1, 1, 10)
+    scheduler.at(P2, 1, 10)
+    writes = len(bus.writes)
+
+    with pytest.raises(ValueError):
+        scheduler.at(P4, 1, 10)
+    with pytest.raises(ValueError):
+        scheduler.pulse(P3, 250)
+    with pytest.raises(ValueError):
+        scheduler.blink(P3, 250)
+
+    # The output of the rejected pulse was not driven
+    assert not pcf.write_byte_buffered & (1 << P3)
+    assert len(bus.writes) == writes
+    assert scheduler._busy == 0
+
+    # A pulse on a pin with a pending transition reuses its slot
+    scheduler.pulse(P1, 100)
+    assert pcf.write_byte_buffered & (1 << P1)
+
+
+def test_invalid_arguments(clock):
+    scheduler, _, bus = make_scheduler()
+    writes = len(bus.writes)
+    with pytest.raises(ValueError):
+        scheduler.pulse(8, 100)
+    with pytest.raises(ValueError):
+        scheduler.blink(P1, 0)
+    assert len(bus.writes) == writes
+
+
+def test_deadline_across_ticks_wrap(clock):
+    scheduler, _, bus = make_scheduler()
+    clock['ms'] = (1 << 30) - 5
+    scheduler.at(P2, 1, 20)
+    scheduler.at(P1, 1, 2)
+    assert queue(scheduler)[0][1] == P1
+
+    # Deadlines 2^30 - 3 and 15
+    clock['ms'] = 10
+    assert scheduler.service() == 1
+    assert bus.writes[-1] == 1 << P1
+    clock['ms'] = 15
+    assert scheduler.service() == 1
+    assert bus.writes[-1] == (1 << P1) | (1 << P2)
+
+
+def test_service_deferred_while_held(clock, scheduled):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.at(P1, 1, 0)
+    writes = len(bus.writes)
+
+    with scheduler:
+        scheduler._timer_callback(None)
+        function, arg = scheduled.pop()
+        function(arg)
+        assert len(bus.writes) == writes
+        assert scheduler._deferred
+
+    # Scheduled again when the block ends
+    assert len(scheduled) == 1
+    function, arg = scheduled.pop()
+    function(arg)
+    assert bus.writes[-1] == 1 << P1
+    assert not scheduler._deferred
+
+
+def test_service_runs_when_not_held(clock, scheduled):
+    scheduler, pcf, bus = make_scheduler()
+    scheduler.at(P1, 1, 0)
+    scheduler._timer_callback(None)
+    function, arg = scheduled.pop()
+    function(arg)
+    assert bus.writes[-1] == 1 << P1
@@ -0,0 +1,138 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Description:
+# Timing with utime.ticks_us, run it with MicroPython on the board with the
+# library (and PCF8574_native.mpy built with --march) copied on the device:
+#   mpremote run tools/benchmark.py
+#
+# - helpers: the helpers that have a native/viper version, pure python
+#   (before) against PCF8574_native (after)
+# - driver calls: the public methods with a RAM only bus, so only the
+#   python side is timed. digital_read_all and digital_read_all_array are
+#   timed with the python and with the native helpers.
+# - single bit: the inline expression used by Pin/digital_read against the
+#   call of the same expression compiled native, the cost of giving the
+#   single bit operations a native version.
+#
+# Without native emitter only the pure python times are printed.
+#
+
+try:
+    import utime
+except ImportError:
+    from PCF8574 import utime
+
+import PCF8574
+from PCF8574 import Pin, P0, P1, P7
+from PCF8574_bus import I2CBus
+
+REPEAT = 1000
+
+NATIVE_BIT_SOURCE = '''
+import micropython
+
+@micropython.native
+def native_bit(value, pin):
+    return (value >> pin) & 1
+'''
+
+
+class MemoryBus(I2CBus):
+    def writeto(self, address, buf):
+        return len(buf)
+
+    def readfrom_into(self, address, buf):
+        for i in range(len(buf)):
+            buf[i] = 0xA5
+
+    def probe(self, address):
+        return True
+
+
+def timed(function, *args):
+    start = utime.ticks_us()
+    for _ in range(REPEAT):
+        function(*args)
+    return utime.ticks_diff(utime.ticks_us(), start) / REPEAT
+
+
+def native_function(source, name):
+    # Compiled at run time: without native emitter the source doesn't compile
+    scope = {}
+    try:
+        exec(source, scope)
+    except (ImportError, SyntaxError, ValueError):
+        return None
+    return scope[name]
+
+
+def print_row(label, before, after=None):
+    print('{:30} {:>12.2f} {:>12}'.format(label, before, '-' if after is None else '{:.2f}'.format(after)))
+
+
+def with_helpers(pack_bits, unpack_bits, function, *args):
+    # Time a driver call with the given helpers in the PCF8574 module globals
+    saved = PCF8574._pack_bits, PCF8574._unpack_bits
+    PCF8574._pack_bits, PCF8574._unpack_bits = pack_bits, unpack_bits
+    try:
+        return timed(function, *args)
+    finally:
+        PCF8574._pack_bits, PCF8574._unpack_bits = saved
+
+
+def main():
+    try:
+        import PCF8574_native as native
+    except (ImportError, SyntaxError, ValueError):
+        native = None
+
+    bits = [1, 0, 1, 1, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 1]
+    out = [0] * 16
+    samples = bytearray(32)
+    samples[31] = 1
+    cases = (
+        ('pack_bits 8', 'pack_bits', (bits, 8)),
+        ('pack_bits 16', 'pack_bits', (bits, 16)),
+        ('unpack_bits 16', 'unpack_bits', (0xA5F0, 16, out)),
+        ('find_change 32 samples', 'find_change', (samples, 0, 32, False, 0)),
+        ('find_change 16 wide samples', 'find_change', (samples, 0, 16, True, 0)),
+    )
+
+    print('{:30} {:>12} {:>12}'.format('helpers, us per call', 'python', 'native'))
+    for label, name, args in cases:
+        before = timed(getattr(PCF8574, '_py_' + name), *args)
+        after = timed(getattr(native, name), *args) if native is not None else None
+        print_row(label, before, after)
+
+    pcf = PCF8574.PCF8574(0x20, i2c=MemoryBus())
+    pcf.Pin(P0, Pin.IN)
+    pcf.Pin(P1, Pin.IN, Pin.PULL_UP)
+    pcf.Pin(P7, Pin.OUT)
+    pcf.begin()
+
+    print('{:30} {:>12} {:>12}'.format('driver calls, us per call', 'python', 'native'))
+    print_row('Pin', timed(pcf.Pin, P0, Pin.IN))
+    print_row('digital_read', timed(pcf.digital_read, P0, True))
+    print_row('digital_write', timed(pcf.digital_write, P7, 1))
+    print_row('read_encoder_value', timed(pcf.read_encoder_value, P0, P1, 0))
+    for label, function in (('digital_read_all', pcf.digital_read_all),
+                            ('digital_read_all_array', pcf.digital_read_all_array)):
+        before = with_helpers(PCF8574._py_pack_bits, PCF8574._py_unpack_bits, function)
+        after = None
+        if native is not None:
+            after = with_helpers(native.pack_bits, native.unpack_bits, function)
+        print_row(label, before, after)
+
+    native_bit = native_function(NATIVE_BIT_SOURCE, 'native_bit')
+    value = 0xA5
+    before = timed(lambda: (value >> 3) & 1)
+    after = timed(lambda: native_bit(value, 3)) if native_bit is not None else None
+    print('{:30} {:>12} {:>12}'.format('single bit, us per call', 'inline', 'native call'))
+    print_row('(value >> pin) & 1', before, after)
+
+
+main()
@@ -0,0 +1,65 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Description:
+# Precompile the library to .mpy files with mpy-cross, ready to be copied
+# on the device (or frozen) so the board doesn't compile the source at boot.
+#
+# Usage:
+#   python tools/build_mpy.py [--march xtensawin] [--mpy-cross mpy-cross] [--out build/mpy]
+#
+# PCF8574_native.py contains native/viper code, so it's compiled only when
+# the target architecture is given with --march (xtensa for esp8266,
+# xtensawin for esp32, armv6m for rp2040, armv7emsp for stm32 ...).
+# Without it the device uses the pure python fallback.
+#
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+MODULES = ['PCF8574.py', 'PCF8574_bus.py', 'PCF8574_group.py', 'PCF8574_events.py', 'PCF8574_breaker.py',
+           'PCF8574_capture.py', 'PCF8574_scheduler.py']
+NATIVE_MODULES = ['PCF8574_native.py']
+
+
+def compile_module(mpy_cross, source, out_dir, march=None):
+    target = os.path.join(out_dir, os.path.splitext(os.path.basename(source))[0] + '.mpy')
+    command = [mpy_cross, '-O2', '-o', target]
+    if march:
+        command.append('-march={}'.format(march))
+    command.append(source)
+    print(' '.join(command))
+    subprocess.check_call(command)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build .mpy files of the PCF8574 library')
+    parser.add_argument('--mpy-cross', default='mpy-cross', help='mpy-cross executable')
+    parser.add_argument('--march', default=None, help='target architecture for native code')
+    parser.add_argument('--out', default=os.path.join(ROOT, 'build', 'mpy'), help='output folder')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.out):
+        os.makedirs(args.out)
+
+    modules = MODULES + (NATIVE_MODULES if args.march else [])
+    for module in modules:
+        compile_module(args.mpy_cross, os.path.join(SRC, module), args.out, args.march)
+
+    if not args.march:
+        print('No --march given, {} skipped: pure python fallback will be used'.format(', '.join(NATIVE_MODULES)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#
+# PCF8574 GPIO Port Expand
+#
+# AUTHOR:  Renzo Mischianti
+# VERSION: 0.0.2
+#
+# Description:
+# Memory budget check, to run with MicroPython on the board (or on the unix
+# port) with the library copied on the device:
+#   mpremote run tools/memory_footprint.py
+#
+# It reports the RAM kept by one PCF8574 instance, with a bus backend and
+# with machine.I2C (wrapped by MachineI2CBus), the RAM allocated by the
+# common operations and fails if a value is over its budget. The instance
+# is compared with the attribute layout of the driver before the RAM
+# reduction. RAM only buses are used, so no expander has to be connected.
+#
+# With CPython (tracemalloc) the values are only printed: the budgets are
+# MicroPython bytes.
+#
+
+import gc
+
+from PCF8574 import PCF8574, PCF8575, Pin, P0, P1, P7
+from PCF8574_bus import I2CBus
+
+# Bytes, gc.mem_free() has the granularity of a gc block (16 bytes on 32 bit)
+INSTANCE_BUDGET = 320
+PCF8575_INSTANCE_BUDGET = 320
+# Instance plus the MachineI2CBus wrapper (one object and 3 bound methods)
+MACHINE_I2C_INSTANCE_BUDGET = 448
+OPERATION_BUDGET = {
+    'digital_write': 0,
+    'digital_read': 0,
+    'digital_read_all_byte': 0,
+    'write_buffer': 0,
+}
+REPEAT = 20
+
+try:
+    mem_free = gc.mem_free
+    CHECK_BUDGETS = True
+except AttributeError:
+    import tracemalloc
+
+    tracemalloc.start()
+    CHECK_BUDGETS = False
+
+    def mem_free():
+        return -tracemalloc.get_traced_memory()[0]
+
+
+class MemoryBus(I2CBus):
+    def __init__(self):
+        self.port = 0
+
+    def writeto(self, address, buf):
+        return len(buf)
+
+    def readfrom_into(self, address, buf):
+        for i in range(len(buf)):
+            buf[i] = (self.port >> (i << 3)) & 0xFF
+
+    def probe(self, address):
+        return True
+
+
+class MemoryI2C:
+    # Same methods of machine.I2C used by MachineI2CBus
+    def writeto(self, address, buf, stop=True):
+        return len(buf)
+
+    def readfrom_into(self, address, buf, stop=True):
+        for i in range(len(buf)):
+            buf[i] = 0
+
+    def readfrom(self, address, nbytes, stop=True):
+        return bytes(nbytes)
+
+    def scan(self):
+        return [0x20]
+
+
+class LayoutBefore:
+    # Instance attributes of the driver before the RAM reduction
+    def __init__(self, bus):
+        self._bus = bus
+        self._address = 0x20
+        self._width = 8
+        self._tx = bytearray(1)
+        self._rx = bytearray(1)
+        self._interrupt_pin = None
+        self._interrupt_callback = None
+        self._interrupt_trigger = Pin.IRQ_FALLING
+        self._interrupt_hard = False
+        self._events = None
+        self.irq_pin = None
+        self.encoder_pins = [False] * 8
+        self.write_mode = 0
+        self.read_mode = 0
+        self.read_mode_pull_down = 0
+        self.read_mode_pull_up = 0
+        self.write_mode_up = 0
+        self.last_read_millis = 0
+        self.reset_initial = 0
+        self.initial_buffer = 0
+        self.byte_buffered = 0
+        self.write_byte_buffered = 0
+        self.encoder_values = 0
+
+
+def retained(function):
+    # RAM still used after a collection by what function returns (kept alive by result)
+    gc.collect()
+    before = mem_free()
+    result = function()
+    gc.collect()
+    return before - mem_free(), result
+
+
+def allocated(function):
+    # RAM allocated by function, garbage included
+    gc.collect()
+    gc.disable()
+    before = mem_free()
+    function()
+    after = mem_free()
+    gc.enable()
+    return before - after
+
+
+def operation_footprint(function):
+    def repeat():
+        for _ in range(REPEAT):
+            function()
+
+    function()  # first call can allocate caches
+    return allocated(repeat) // REPEAT
+
+
+def check(label, size, budget, unit='bytes'):
+    if not CHECK_BUDGETS:
+        print('{}: {} {}'.format(label, size, unit))
+        return True
+    print('{}: {} {} (budget {})'.format(label, size, unit, budget))
+    return size <= budget
+
+
+def main():
+    ok = True
+    bus = MemoryBus()
+
+    before, _ = retained(lambda: LayoutBefore(bus))
+    print('instance layout before the RAM reduction: {} bytes'.format(before))
+    for cls, budget in ((PCF8574, INSTANCE_BUDGET), (PCF8575, PCF8575_INSTANCE_BUDGET)):
+        size, _ = retained(lambda: cls(0x20, i2c=bus))
+        ok = check('{} instance'.format(cls.__name__), size, budget) and ok
+
+    i2c = MemoryI2C()
+    size, _ = retained(lambda: PCF8574(0x20, i2c=i2c))
+    ok = check('PCF8574 instance with machine.I2C', size, MACHINE_I2C_INSTANCE_BUDGET) and ok
+
+    for label, pcf in (('', PCF8574(0x20, i2c=bus)), (' (machine.I2C)', PCF8574(0x20, i2c=i2c))):
+        pcf.Pin(P0, Pin.IN)
+        pcf.Pin(P1, Pin.IN, Pin.PULL_UP)
+        pcf.Pin(P7, Pin.OUT)
+        pcf.begin()
+
+        operations = (
+            ('digital_write', lambda: pcf.digital_write(P7, 1)),
+            ('digital_read', lambda: pcf.digital_read(P0, True)),
+            ('digital_read_all_byte', pcf.digital_read_all_byte),
+            ('write_buffer', pcf.write_buffer),
+        )
+        for name, function in operations:
+            size = operation_footprint(function)
+            ok = check(name + label, size, OPERATION_BUDGET[name], 'bytes per call') and ok
+
+    print('OK' if ok else 'FAILED')
+    return ok
+
+
+raise SystemExit(0 if main() else 1)